@@ -24,6 +24,9 @@ class ActivityTracker:
         self.last_activity_time = None
         self.total_messages_processed = 0
         self.bot_start_time = None
+        # When logging began for this activity file; None if it predates this field
+        self.first_start_time = None
+        self._has_history = False
 
         # Configure logging
         self.logger = logging.getLogger('activity_tracker')
@@ -49,6 +52,7 @@ class ActivityTracker:
             if self.activity_file.exists():
                 with open(self.activity_file, 'r', encoding='utf-8') as f:
                     data = json.load(f)
+                self._has_history = True
 
                 # Parse timestamps
                 if data.get('last_activity_time'):
@@ -57,6 +61,9 @@ class ActivityTracker:
                 if data.get('bot_start_time'):
                     self.bot_start_time = datetime.fromisoformat(data['bot_start_time'])
 
+                if data.get('first_start_time'):
+                    self.first_start_time = datetime.fromisoformat(data['first_start_time'])
+
                 self.total_messages_processed = data.get('total_messages_processed', 0)
 
                 self.logger.info(f"📊 Activity data loaded from {self.activity_file}")
@@ -73,6 +80,7 @@ class ActivityTracker:
             data = {
                 'last_activity_time': self.last_activity_time.isoformat() if self.last_activity_time else None,
                 'bot_start_time': self.bot_start_time.isoformat() if self.bot_start_time else None,
+                'first_start_time': self.first_start_time.isoformat() if self.first_start_time else None,
                 'total_messages_processed': self.total_messages_processed,
                 'last_updated': datetime.now().isoformat()
             }
@@ -102,6 +110,9 @@ class ActivityTracker:
         """Record when the bot starts"""
         self.bot_start_time = datetime.now()
         self.last_activity_time = datetime.now()
+        # Only a genuinely fresh tracker knows nothing was logged before now
+        if self.first_start_time is None and not self._has_history:
+            self.first_start_time = self.bot_start_time
         self._save_activity_data()
 
         self.logger.info(f"🚀 Bot start recorded at {self.bot_start_time.isoformat()}")
@@ -5,15 +5,18 @@ Supports both OAuth 2.0 (Desktop App) and Service Account
 """
 
 import os
+import io
 import json
+import mimetypes
 import asyncio
 import pickle
+import threading
 from typing import Optional, Dict, Any, Union
 from google.oauth2 import service_account
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
+from googleapiclient.http import MediaFileUpload, MediaIoBaseUpload
 from googleapiclient.errors import HttpError
 
 
@@ -46,6 +49,9 @@ class GoogleDriveManager:
         self.folder_id: Optional[str] = None
         self._initialized = False
         self.auth_method = "unknown"
+        
+        # The API client (httplib2 underneath) is not thread-safe; uploads run in worker threads
+        self._service_lock = threading.Lock()
     
     async def initialize(self) -> bool:
         """
@@ -279,8 +285,8 @@ class GoogleDriveManager:
             print(f"❌ Error managing Discord folder: {e}")
             return None
     
-    async def upload_file(self, file_path: str, original_filename: str, message_id: str) -> Optional[Dict[str, Any]]:
-        """Upload file to Google Drive"""
+    async def upload_file(self, source: Union[str, bytes], original_filename: str, message_id: str) -> Optional[Dict[str, Any]]:
+        """Upload file to Google Drive (source is a local path or the file's bytes)"""
         if not self._initialized or not self.service or not self.folder_id:
             return None
         
@@ -294,11 +300,20 @@ class GoogleDriveManager:
                     'description': f'Discord attachment from message {message_id}'
                 }
                 
-                media = MediaFileUpload(
-                    file_path, 
-                    resumable=True,
-                    chunksize=1024*1024
-                )
+                if isinstance(source, bytes):
+                    mime_type = mimetypes.guess_type(original_filename)[0] or 'application/octet-stream'
+                    media = MediaIoBaseUpload(
+                        io.BytesIO(source),
+                        mimetype=mime_type,
+                        resumable=True,
+                        chunksize=1024*1024
+                    )
+                else:
+                    media = MediaFileUpload(
+                        source, 
+                        resumable=True,
+                        chunksize=1024*1024
+                    )
                 
                 file = self.service.files().create(
                     body=file_metadata,
@@ -322,7 +337,11 @@ class GoogleDriveManager:
                     'direct_download_link': f"https://drive.google.com/uc?id={file['id']}&export=download"
                 }
             
-            result = await asyncio.to_thread(_upload_operations)
+            def _locked_upload_operations():
+                with self._service_lock:
+                    return _upload_operations()
+            
+            result = await asyncio.to_thread(_locked_upload_operations)
             if result:
                 print(f"✅ Uploaded to Drive: {original_filename}")
                 return result
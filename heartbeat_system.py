@@ -8,6 +8,7 @@ import logging
 import time
 from typing import Optional
 from datetime import datetime
+from urllib.parse import urlsplit
 
 
 class HeartbeatSystem:
@@ -28,6 +29,15 @@ class HeartbeatSystem:
         self.ping_count = 0
         self.failed_pings = 0
         
+        # Sesión HTTP compartida (keep-alive) para todos los pings; se crea dentro del loop
+        self._session: Optional[aiohttp.ClientSession] = None
+        
+        # Pings encolados desde el bot, enviados por una tarea en segundo plano
+        self._ping_queue: Optional[asyncio.Queue] = None
+        self._ping_task: Optional[asyncio.Task] = None
+        self._coalesce_window = 10  # segundos: pings "success" más seguidos se descartan
+        self._last_success_queued = float('-inf')
+        
         # Configurar logging
         self.logger = logging.getLogger('heartbeat')
         self.logger.setLevel(logging.INFO)
@@ -40,6 +50,81 @@ class HeartbeatSystem:
             console_handler.setFormatter(formatter)
             self.logger.addHandler(console_handler)
     
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Obtener la sesión compartida, creándola en el primer uso"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=10, keepalive_timeout=60, enable_cleanup_closed=True),
+                timeout=aiohttp.ClientTimeout(total=10)
+            )
+        return self._session
+    
+    async def close(self):
+        """Cerrar la sesión HTTP compartida"""
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
+    
+    async def preconnect(self):
+        """
+        Calentar DNS y TLS hacia el host de pings antes del primer heartbeat
+        
+        Usa HEAD sobre la raíz del host (no sobre la URL del check, que contaría como ping);
+        la conexión queda en el pool keep-alive para el ping de inicio.
+        """
+        parts = urlsplit(self.ping_url)
+        try:
+            async with self._get_session().head(f"{parts.scheme}://{parts.netloc}/", timeout=aiohttp.ClientTimeout(total=5)):
+                pass
+        except Exception as e:
+            self.logger.debug(f"Preconexión fallida (se reintentará en el primer ping): {e}")
+    
+    def queue_ping(self, status: str = "success", message: Optional[str] = None):
+        """
+        Encolar un ping sin esperar la petición HTTP (para llamadas desde el flujo de mensajes)
+        
+        Los pings "success" dentro de la ventana de coalescencia se descartan; los "fail" siempre se envían
+        y el primer "success" tras ellos también, para que el check vuelva a UP de inmediato
+        """
+        if status == "success":
+            now = time.monotonic()
+            if now - self._last_success_queued < self._coalesce_window:
+                return
+            self._last_success_queued = now
+        else:
+            # Reiniciar la ventana: un "success" posterior (p. ej. conexión reanudada) nunca se descarta
+            self._last_success_queued = float('-inf')
+        
+        if self._ping_queue is None:
+            self._ping_queue = asyncio.Queue(maxsize=32)
+            self._ping_task = asyncio.create_task(self._ping_sender())
+        
+        try:
+            self._ping_queue.put_nowait((status, message))
+        except asyncio.QueueFull:
+            self.logger.warning(f"⚠️ Cola de pings llena, ping descartado ({status})")
+    
+    async def _ping_sender(self):
+        """Enviar en orden los pings encolados"""
+        while True:
+            status, message = await self._ping_queue.get()
+            try:
+                await self.send_ping(status, message)
+            finally:
+                self._ping_queue.task_done()
+    
+    async def flush_pings(self, timeout: float = 15):
+        """Esperar a los pings encolados y detener la tarea que los envía"""
+        if self._ping_queue is None:
+            return
+        try:
+            await asyncio.wait_for(self._ping_queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            self.logger.warning(f"⚠️ {self._ping_queue.qsize()} pings encolados sin enviar")
+        self._ping_task.cancel()
+        self._ping_queue = None
+        self._ping_task = None
+    
     async def send_ping(self, status: str = "success", message: Optional[str] = None):
         """
         Enviar ping a Healthchecks.io
@@ -60,17 +145,17 @@ class HeartbeatSystem:
             if message:
                 data = message.encode('utf-8')
             
-            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10)) as session:
-                async with session.post(url, data=data) as response:
-                    if response.status == 200:
-                        self.ping_count += 1
-                        self.last_ping_time = datetime.now()
-                        self.logger.info(f"✅ Ping enviado exitosamente ({status}) - Total: {self.ping_count}")
-                        return True
-                    else:
-                        self.failed_pings += 1
-                        self.logger.warning(f"⚠️ Ping falló con código {response.status}")
-                        return False
+            # Reutiliza la conexión TLS abierta en vez de un handshake por ping
+            async with self._get_session().post(url, data=data) as response:
+                if response.status == 200:
+                    self.ping_count += 1
+                    self.last_ping_time = datetime.now()
+                    self.logger.info(f"✅ Ping enviado exitosamente ({status}) - Total: {self.ping_count}")
+                    return True
+                else:
+                    self.failed_pings += 1
+                    self.logger.warning(f"⚠️ Ping falló con código {response.status}")
+                    return False
                         
         except asyncio.TimeoutError:
             self.failed_pings += 1
@@ -114,15 +199,19 @@ class HeartbeatSystem:
     
     async def stop_heartbeat(self):
         """Detener el sistema de heartbeats"""
-        if not self.is_running:
-            return
+        # Los pings pendientes salen antes que el ping de parada
+        await self.flush_pings()
         
-        self.is_running = False
-        self.logger.info("⏹️ Deteniendo sistema de heartbeats")
+        if self.is_running:
+            self.is_running = False
+            self.logger.info("⏹️ Deteniendo sistema de heartbeats")
+            
+            # Enviar ping de parada
+            final_msg = f"Bot detenido - Total pings: {self.ping_count}, Fallos: {self.failed_pings}"
+            await self.send_ping("fail", final_msg)
         
-        # Enviar ping de parada
-        final_msg = f"Bot detenido - Total pings: {self.ping_count}, Fallos: {self.failed_pings}"
-        await self.send_ping("fail", final_msg)
+        # Liberar las conexiones del pool
+        await self.close()
     
     def get_status(self) -> dict:
         """Obtener estado actual del sistema de heartbeats"""
@@ -159,6 +248,7 @@ async def test_heartbeat_system():
     status = heartbeat.get_status()
     print(f"📊 Estado: {status}")
     
+    await heartbeat.close()
     print("✅ Prueba completada")
 
 
@@ -214,7 +214,7 @@ class BotMonitor:
                 break
             except Exception as e:
                 print(f"❌ Error en loop de monitoreo: {e}")
-                await self.heartbeat.send_ping("fail", f"Error en monitor: {str(e)[:100]}")
+                await self.heartbeat.send_ping("fail", f"Error en monitor: {e!s:.100}")
                 await asyncio.sleep(30)  # Esperar antes de reintentar
     
     async def start(self):
@@ -226,6 +226,7 @@ class BotMonitor:
         """Detener el monitor"""
         self.is_running = False
         await self.heartbeat.send_ping("fail", f"Monitor detenido - Reinicios realizados: {self.bot_restart_count}")
+        await self.heartbeat.close()
         print("⏹️ Monitor detenido")
 
 
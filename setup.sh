@@ -37,7 +37,6 @@ if [ ! -f "requirements.txt" ]; then
     echo "📝 Creando requirements.txt..."
     cat > requirements.txt << 'EOF'
 discord.py-self==2.1.0b5113+g71609f4f
-notion-client==2.2.1
 python-dotenv==1.0.0
 aiohttp==3.12.13
 EOF
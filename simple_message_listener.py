@@ -1,105 +1,243 @@
 import discord
 import os
-import datetime
 import asyncio
 import aiohttp
+import orjson
 import tempfile
 import mimetypes
-import json
+import logging
+import logging.handlers
+import queue
+import atexit
 import re
 import random
-import requests
-from typing import Optional, List
+import signal
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional, List, FrozenSet, Tuple, Union
 from dotenv import load_dotenv
-from notion_client import Client
 from heartbeat_system import HeartbeatSystem
 from google_drive_manager import GoogleDriveManager
 from activity_tracker import ActivityTracker
 
-# Import the quickUpload function for official Notion file uploads
-def quickUpload(filePath: str, pageId: str, notionToken: str) -> Optional[dict]:
-    """
-    Official Notion file upload function using the Direct Upload API (3-step process).
+# libuv-backed event loop when available (not on Windows); falls back to asyncio's default loop
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+# Load environment variables
+load_dotenv()
+
+# Logger for the per-message pipeline (configured in setup_logging)
+logger = logging.getLogger('message_listener')
+
+# Strips dashes from Notion page IDs when building page URLs
+_NO_DASH = str.maketrans('', '', '-')
+
+# URL detection for message content (compiled once, used per message)
+_URL_RE = re.compile(r'https?://[^\s<>"\']+')
+
+# Attachment kinds by lowercase file extension
+_IMAGE_EXTENSIONS = frozenset({'.jpg', '.jpeg', '.png', '.gif', '.webp', '.bmp', '.svg', '.tiff', '.tif'})
+_VIDEO_EXTENSIONS = frozenset({'.mp4', '.mov', '.webm', '.mkv', '.avi', '.flv', '.wmv', '.m4v'})
+
+# Attachments up to this size stay in memory; larger ones are spilled to a temp file
+_SPILL_THRESHOLD = 8 * 1024 * 1024
+
+# Database queries (100 pages each) spent prefilling the Notion lookup cache at startup
+_WARM_MAX_QUERIES = 5
+
+# Lookup cache snapshots older than this are ignored (pages may have been deleted or moved meanwhile)
+_URL_CACHE_SNAPSHOT_MAX_AGE = 7 * 24 * 3600
+
+# Total attachment bytes held in memory across all Notion writers; past it, attachments spill to disk too
+_BUFFER_BUDGET = 64 * 1024 * 1024
+
+# Attachment download chunk: ~100 loop iterations for a 25 MB upload instead of ~3200 at 8 KiB
+_DOWNLOAD_CHUNK_SIZE = 256 * 1024
+
+# Shape of a Discord token (user ID.timestamp.HMAC, or legacy mfa.<HMAC>), checked before connecting
+_TOKEN_RE = re.compile(r'(?:[A-Za-z0-9_-]{20,}\.[A-Za-z0-9_-]{5,}\.[A-Za-z0-9_-]{20,}|mfa\.[A-Za-z0-9_-]{20,})')
+
+
+def _rich_text(content: str, bold: bool = False, href: Optional[str] = None) -> dict:
+    """Single Notion rich-text item"""
+    item = {"type": "text", "text": {"content": content}}
+    if bold:
+        item["annotations"] = {"bold": True}
+    if href:
+        item["href"] = href
+    return item
+
+
+def _text_block(kind: str, content: str, bold: bool = False, href: Optional[str] = None) -> dict:
+    """Notion block of the given kind (paragraph, heading_3, ...) holding one rich-text item"""
+    return {"object": "block", "type": kind, kind: {"rich_text": [_rich_text(content, bold, href)]}}
+
+
+def _table_row(label: str, value: str) -> dict:
+    """Two-cell Notion table row: bold label, plain value"""
+    return {
+        "object": "block",
+        "type": "table_row",
+        "table_row": {"cells": [[_rich_text(label, bold=True)], [_rich_text(value)]]}
+    }
+
+
+# Static Notion blocks, built once and shared by every page (payloads are only serialized, never mutated)
+_DIVIDER = {"object": "block", "type": "divider", "divider": {}}
+_DETAILS_HEADING = _text_block("heading_3", "📧 Message Details")
+
+
+def setup_logging(level: str = 'INFO'):
+    """Attach a console handler to the message logger and set its level (LOG_LEVEL)"""
+    if not logger.handlers:
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+        # The event loop only enqueues records; a background thread does the blocking console writes
+        log_queue = queue.SimpleQueue()
+        logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        log_listener = logging.handlers.QueueListener(log_queue, console_handler)
+        log_listener.start()
+        atexit.register(log_listener.stop)  # Flush queued records on exit
+    logger.setLevel(level)
+
+
+class NotionAPIError(Exception):
+    """Non-success response from the Notion REST API"""
     
-    Args:
-        filePath: Path to the local file to upload
-        pageId: ID of the Notion page where the file will be attached (unused in upload step)
-        notionToken: Notion API token
+    def __init__(self, status: int, message: str = "", retry_after: Optional[float] = None):
+        self.status = status
+        self.retry_after = retry_after  # Seconds Notion asked us to wait (429 responses)
+        super().__init__(f"Notion API error {status}: {message}")
+
+
+class ConfigError(Exception):
+    """Missing or invalid bot configuration"""
+
+
+def _parse_channel_ids(channel_ids_str: str) -> FrozenSet[int]:
+    """Parse comma-separated channel IDs, ignoring comments and empty entries"""
+    # Remove comments (everything after #)
+    head = channel_ids_str.partition('#')[0]
+    channel_ids = set()
+    for cid in head.split(','):
+        cid = cid.strip()
+        if not cid:
+            continue
+        # An empty set means "monitor ALL channels", so a bad entry must not be dropped silently
+        if not cid.isdigit():
+            raise ConfigError(f"❌ MONITORING_CHANNEL_IDS contains a non-numeric channel ID: {cid!r}")
+        channel_ids.add(int(cid))
+    return frozenset(channel_ids)
+
+
+def _env_number(name: str, default: str, kind: type = int):
+    """Read a numeric setting, turning parse failures into ConfigError"""
+    raw = os.getenv(name) or default
+    try:
+        return kind(raw)
+    except ValueError:
+        raise ConfigError(f"❌ {name} must be a number, got {raw!r}") from None
+
+
+@dataclass(frozen=True, slots=True)
+class Config:
+    """Process-wide settings, read from the environment once and validated on construction"""
+    token: Optional[str]
+    target_server_id: Optional[str]
+    target_channel_ids: FrozenSet[int]
+    log_file: str
+    log_level: str
+    notion_token: Optional[str]
+    notion_database_id: Optional[str]
+    io_threads: int
+    notion_workers: int
+    notion_max_concurrency: int
+    notion_rate_limit: float
+    notion_url_cache_size: int
+    notion_url_cache_file: str
+    heartbeat_url: Optional[str]
+    heartbeat_interval: int
+    google_drive_enabled: bool
+    google_drive_service_account: Optional[str]
+    google_drive_credentials: str
+    google_drive_token: str
+    google_drive_folder_id: Optional[str]
+    activity_file: str
     
-    Returns:
-        Dict with file upload ID for Notion properties if successful, None if failed
-    """
-    import requests
-    import os
+    @classmethod
+    def from_env(cls) -> "Config":
+        """Build the configuration from environment variables (.env already loaded)"""
+        return cls(
+            token=os.getenv('DISCORD_TOKEN'),
+            target_server_id=os.getenv('MONITORING_SERVER_ID'),
+            target_channel_ids=_parse_channel_ids(os.getenv('MONITORING_CHANNEL_IDS', '')),
+            log_file=os.getenv('LOG_FILE', './logs/messages.json'),
+            log_level=os.getenv('LOG_LEVEL', 'INFO').upper(),
+            notion_token=os.getenv('NOTION_TOKEN'),
+            notion_database_id=os.getenv('NOTION_DATABASE_ID'),
+            io_threads=_env_number('IO_THREADS', os.getenv('NOTION_THREADS', '8')),  # NOTION_THREADS: legacy name
+            notion_workers=_env_number('NOTION_WORKERS', '8'),
+            notion_max_concurrency=_env_number('NOTION_MAX_CONCURRENCY', '8'),
+            notion_rate_limit=_env_number('NOTION_RATE_LIMIT', '3', float),
+            notion_url_cache_size=_env_number('NOTION_URL_CACHE_SIZE', '10000'),
+            notion_url_cache_file=os.getenv('NOTION_URL_CACHE_FILE', './logs/notion_url_cache.json'),
+            heartbeat_url=os.getenv('HEALTHCHECKS_PING_URL', 'https://hc-ping.com/f679a27c-8a41-4ae2-9504-78f1b260e71d'),
+            heartbeat_interval=_env_number('HEARTBEAT_INTERVAL', '300'),
+            google_drive_enabled=os.getenv('GOOGLE_DRIVE_ENABLED', 'false').lower() == 'true',
+            google_drive_service_account=os.getenv('GOOGLE_SERVICE_ACCOUNT_FILE'),
+            google_drive_credentials=os.getenv('GOOGLE_DRIVE_CREDENTIALS_FILE', 'credentials.json'),
+            google_drive_token=os.getenv('GOOGLE_DRIVE_TOKEN_FILE', 'token.pickle'),
+            google_drive_folder_id=os.getenv('GOOGLE_DRIVE_FOLDER_ID', None),
+            activity_file=os.getenv('ACTIVITY_TRACKER_FILE', './logs/bot_activity.json'),
+        )
     
-    try:
-        filename = os.path.basename(filePath)
+    def __post_init__(self):
+        if not self.token:
+            raise ConfigError("❌ Discord token not found. Set DISCORD_TOKEN in the .env file")
         
-        headers = {
-            'Authorization': f'Bearer {notionToken}',
-            'Notion-Version': '2022-06-28'
-        }
+        if not _TOKEN_RE.fullmatch(self.token):
+            raise ConfigError("❌ Invalid token: DISCORD_TOKEN is not a well-formed Discord token")
         
-        # Step 1: Create a file upload object (empty body)
-        print(f"📁 Step 1: Creating file upload object for {filename}...")
-        response = requests.post(
-            'https://api.notion.com/v1/file_uploads',
-            headers={**headers, 'Content-Type': 'application/json'},
-            json={}  # Empty body as per official docs
-        )
+        if not self.target_server_id:
+            raise ConfigError("❌ Server ID not configured. Set MONITORING_SERVER_ID in the .env file")
         
-        if response.status_code != 200:
-            print(f"❌ Failed to create file upload: {response.status_code} - {response.text}")
-            return None
+        if not self.target_server_id.isdigit():
+            raise ConfigError("❌ MONITORING_SERVER_ID must be numeric")
         
-        upload_data = response.json()
-        upload_id = upload_data.get('id')
-        upload_url = upload_data.get('upload_url')
+        if self.log_level not in logging.getLevelNamesMapping():
+            raise ConfigError(f"❌ Unknown LOG_LEVEL {self.log_level!r} (use DEBUG, INFO, WARNING, ERROR or CRITICAL)")
         
-        if not upload_id or not upload_url:
-            print("❌ No upload ID or upload URL in response")
-            return None
+        # Zero would deadlock or stall the Notion pipeline (Semaphore(0), no queue consumers, no threads)
+        for name, value in (
+            ('IO_THREADS', self.io_threads),
+            ('NOTION_WORKERS', self.notion_workers),
+            ('NOTION_MAX_CONCURRENCY', self.notion_max_concurrency),
+            ('NOTION_URL_CACHE_SIZE', self.notion_url_cache_size),
+            ('HEARTBEAT_INTERVAL', self.heartbeat_interval),
+        ):
+            if value <= 0:
+                raise ConfigError(f"❌ {name} must be greater than 0")
         
-        print(f"✅ File upload object created with ID: {upload_id}")
+        if self.notion_rate_limit <= 0:
+            raise ConfigError("❌ NOTION_RATE_LIMIT must be a positive number of requests per second")
         
-        # Step 2: Upload file content using multipart/form-data
-        print(f"📁 Step 2: Uploading file content...")
-        with open(filePath, 'rb') as f:
-            files = {'file': (filename, f, mimetypes.guess_type(filename)[0] or 'application/octet-stream')}
-            
-            # Note: Don't set Content-Type header, let requests handle multipart boundary
-            upload_response = requests.post(
-                upload_url,  # This should be something like /v1/file_uploads/{id}/send
-                headers={k: v for k, v in headers.items() if k != 'Content-Type'},  # Remove Content-Type
-                files=files
+        if self.google_drive_enabled and not self.drive_uses_service_account and not os.path.exists(self.google_drive_credentials):
+            raise ConfigError(
+                "❌ Google Drive enabled but no valid credentials found\n"
+                "   For Service Account: Set GOOGLE_SERVICE_ACCOUNT_FILE=service_account.json\n"
+                "   For OAuth2 (legacy): Download credentials.json from Google Cloud Console\n"
+                "   Set GOOGLE_DRIVE_ENABLED=false to disable Google Drive"
             )
-        
-        if upload_response.status_code not in [200, 201]:
-            print(f"❌ File upload failed: {upload_response.status_code} - {upload_response.text}")
-            return None
-        
-        upload_result = upload_response.json()
-        print(f"✅ File uploaded successfully: {filename}")
-        
-        # Step 3: Return file upload object for Notion properties
-        # The file can now be attached using the upload_id
-        file_info = {
-            "type": "file_upload",
-            "file_upload": {
-                "id": upload_id
-            },
-            "name": filename
-        }
-        
-        print(f"✅ File ready for attachment with ID: {upload_id}")
-        return file_info
-        
-    except Exception as e:
-        print(f"❌ Error in quickUpload: {e}")
-        return None
-
-# Load environment variables
-load_dotenv()
+    
+    @property
+    def drive_uses_service_account(self) -> bool:
+        return bool(self.google_drive_service_account) and os.path.exists(self.google_drive_service_account)
 
 
 class SimpleMessageListener:
@@ -108,18 +246,47 @@ class SimpleMessageListener:
     
     Features:
     - Listens for new messages and processes them instantly
-    - Uploads files to Notion using official quickUpload function (3-step API process)
+    - Uploads files to Notion using the official Direct Upload API (3-step process)
     - Supports Google Drive integration for file backup
     - Handles images and files with direct Notion upload
     - Rate limiting and retry logic for robust operation
     """
     
-    def __init__(self):
+    # Long-lived singleton touched on every event: fixed attribute layout, no per-instance __dict__
+    __slots__ = (
+        # Discord / monitoring
+        'config', 'token', 'target_server_id', '_target_server_id_int', 'target_channel_ids', 'client',
+        'is_monitoring', 'processed_messages', 'failed_messages', '_bot_start_snowflake',
+        # Logging and backup files
+        'log_file', 'log_level', 'jsonl_log_file', '_jsonl_fp', '_log_fp',
+        '_jsonl_queue', '_jsonl_writer_task', '_jsonl_batch_size', '_log_flush_task', '_log_flush_interval',
+        # Notion
+        'notion_token', 'notion_database_id', '_io_executor', '_notion_http',
+        'http_session', '_notion_max_concurrency', '_notion_sem', '_notion_request_interval', '_notion_next_slot',
+        '_upload_sem', '_buffered_bytes', '_page_templates',
+        '_notion_url_cache', '_notion_url_cache_size', '_notion_miss_ttl', '_notion_url_cache_file', '_notion_warm_task', '_inflight_lookups',
+        '_notion_queue', '_notion_worker_tasks', '_notion_queue_size', '_notion_worker_count',
+        '_notion_drain_timeout',
+        # Heartbeat, Google Drive and activity tracking
+        'heartbeat_url', 'heartbeat_interval', 'heartbeat_system',
+        'google_drive_enabled', 'google_drive_service_account', 'google_drive_credentials',
+        'google_drive_token', 'google_drive_folder_id', 'google_drive_manager', 'activity_tracker',
+        # Startup banner and its status labels
+        '_channels_status', '_notion_status', '_drive_status', '_heartbeat_status', '_startup_banner',
+    )
+    
+    def __init__(self, config: Optional[Config] = None):
+        # Validated, immutable settings (read from the environment when not given)
+        self.config = config = config or Config.from_env()
+        
         # Basic configuration
-        self.token = os.getenv('DISCORD_TOKEN')
-        self.target_server_id = os.getenv('MONITORING_SERVER_ID')
-        self.target_channel_ids = self._parse_channel_ids(os.getenv('MONITORING_CHANNEL_IDS', ''))
-        self.log_file = os.getenv('LOG_FILE', './logs/messages.json')
+        self.token = config.token
+        self.target_server_id = config.target_server_id
+        # Integer form used by the per-message filter
+        self._target_server_id_int = int(config.target_server_id)
+        self.target_channel_ids = config.target_channel_ids
+        self.log_file = config.log_file
+        self.log_level = config.log_level
         
         # Real-time monitoring control
         self.processed_messages = 0
@@ -127,23 +294,72 @@ class SimpleMessageListener:
         self.is_monitoring = False
         
         # Notion configuration
-        self.notion_token = os.getenv('NOTION_TOKEN')
-        self.notion_database_id = os.getenv('NOTION_DATABASE_ID')
-        self.notion_client = None
+        self.notion_token = config.notion_token
+        self.notion_database_id = config.notion_database_id
+        
+        # Persistent worker threads behind to_thread (temp-file and Drive I/O), installed as the loop's default executor
+        self._io_executor = ThreadPoolExecutor(
+            max_workers=config.io_threads,
+            thread_name_prefix='io'
+        )
+        
+        # Shared aiohttp session for Notion REST calls (created lazily inside the running loop)
+        self._notion_http: Optional[aiohttp.ClientSession] = None
+        
+        # Shared pooled session for attachment downloads (created lazily inside the running loop)
+        self.http_session: Optional[aiohttp.ClientSession] = None
+        
+        # Cap on simultaneous Notion HTTP calls so bursts queue locally instead of drawing 429s
+        self._notion_max_concurrency = config.notion_max_concurrency
+        self._notion_sem: Optional[asyncio.Semaphore] = None
+        
+        # Attachments downloaded (and sent to Drive) at once, across all Notion writers
+        self._upload_sem = asyncio.Semaphore(4)
+        
+        # In-memory attachment bytes currently held (bounded by _BUFFER_BUDGET until their Notion upload ends)
+        self._buffered_bytes = 0
+        
+        # Request pacing: Notion allows an average of ~3 requests/second per integration
+        self._notion_request_interval = 1.0 / config.notion_rate_limit
+        self._notion_next_slot = 0.0
+        
+        # (guild ID, channel ID) -> static parent/Server/Channel/Category page scaffolding
+        self._page_templates: dict = {}
+        
+        # Discord message ID -> (Notion page URL, expiry); None URLs are short-lived negative entries
+        self._notion_url_cache: "OrderedDict[str, Tuple[Optional[str], Optional[float]]]" = OrderedDict()
+        self._notion_url_cache_size = config.notion_url_cache_size
+        self._notion_miss_ttl = 60.0  # seconds
+        self._notion_warm_task: Optional[asyncio.Task] = None
+        
+        # Snapshot of the URL cache kept across restarts (saved at shutdown, loaded at startup)
+        self._notion_url_cache_file = config.notion_url_cache_file
+        
+        # Messages with IDs below this snowflake predate all logging and can never be in Notion
+        self._bot_start_snowflake = 0
+        
+        # Message ID -> pending lookup, so concurrent replies to one parent share a single query
+        self._inflight_lookups: dict = {}
+        
+        # Notion write queue, drained concurrently by a pool of _notion_worker tasks
+        self._notion_queue: Optional[asyncio.Queue] = None
+        self._notion_worker_tasks: List[asyncio.Task] = []
+        self._notion_queue_size = 1000
+        self._notion_worker_count = config.notion_workers
+        self._notion_drain_timeout = 30  # seconds to wait for queued writes at shutdown
         
         # Heartbeat configuration
-        self.heartbeat_url = os.getenv('HEALTHCHECKS_PING_URL', 'https://hc-ping.com/f679a27c-8a41-4ae2-9504-78f1b260e71d')
-        heartbeat_val = os.getenv('HEARTBEAT_INTERVAL') or '300'
-        self.heartbeat_interval = int(heartbeat_val)
+        self.heartbeat_url = config.heartbeat_url
+        self.heartbeat_interval = config.heartbeat_interval
         self.heartbeat_system = None
         
         # Google Drive configuration - UPDATED FOR OAUTH2 & SERVICE ACCOUNT
-        self.google_drive_enabled = os.getenv('GOOGLE_DRIVE_ENABLED', 'false').lower() == 'true'
+        self.google_drive_enabled = config.google_drive_enabled
         
-        self.google_drive_service_account = os.getenv('GOOGLE_SERVICE_ACCOUNT_FILE')
-        self.google_drive_credentials = os.getenv('GOOGLE_DRIVE_CREDENTIALS_FILE', 'credentials.json')
-        self.google_drive_token = os.getenv('GOOGLE_DRIVE_TOKEN_FILE', 'token.pickle')
-        self.google_drive_folder_id = os.getenv('GOOGLE_DRIVE_FOLDER_ID', None)
+        self.google_drive_service_account = config.google_drive_service_account
+        self.google_drive_credentials = config.google_drive_credentials
+        self.google_drive_token = config.google_drive_token
+        self.google_drive_folder_id = config.google_drive_folder_id
         self.google_drive_manager = None
         
         # Initialize heartbeat system
@@ -152,18 +368,12 @@ class SimpleMessageListener:
             print(f"✅ Heartbeat system configured (interval: {self.heartbeat_interval}s)")
 
         # Initialize activity tracker
-        activity_file = os.getenv('ACTIVITY_TRACKER_FILE', './logs/bot_activity.json')
-        self.activity_tracker = ActivityTracker(activity_file)
+        self.activity_tracker = ActivityTracker(config.activity_file)
         print(f"✅ Activity tracker initialized")
         
-        # Initialize Notion client if configured
+        # Notion is used through its REST API on a shared aiohttp session (created lazily in the loop)
         if self.notion_token and self.notion_database_id:
-            try:
-                self.notion_client = Client(auth=self.notion_token)
-                print("✅ Notion client initialized successfully")
-            except Exception as e:
-                print(f"❌ Error initializing Notion: {e}")
-                self.notion_client = None
+            print("✅ Notion configured")
         
         # Initialize Google Drive manager if enabled
         if self.google_drive_enabled:
@@ -182,113 +392,175 @@ class SimpleMessageListener:
         
         # Discord client (self-bot)
         self.client = discord.Client()
+        self._install_message_prefilter()
         
         # Ensure log directory exists
         os.makedirs(os.path.dirname(self.log_file), exist_ok=True)
         
+        # Restore lookups from the previous run
+        self._load_notion_url_cache()
+        
+        # Backup entries are appended as JSON Lines next to the configured log file
+        self.jsonl_log_file = os.path.splitext(self.log_file)[0] + '.jsonl'
+        
+        # Both logs stay open with user-space buffers; flushed periodically and on shutdown
+        self._jsonl_fp = open(self.jsonl_log_file, 'ab', buffering=512 * 1024)
+        self._log_fp = open(self.log_file, 'a', encoding='utf-8', buffering=1 << 16)
+        self._log_flush_task: Optional[asyncio.Task] = None
+        self._log_flush_interval = 5  # seconds
+        
+        # Encoded JSONL lines, written in batches by _jsonl_writer
+        self._jsonl_queue: asyncio.Queue = asyncio.Queue()
+        self._jsonl_writer_task: Optional[asyncio.Task] = None
+        self._jsonl_batch_size = 100
+        
+        # Status labels for the startup banner, fixed once the configuration is loaded
+        self._channels_status = "Specific" if self.target_channel_ids else "All"
+        self._notion_status = "✅ Configured (Official 3-Step Upload API + Smart Rate Limiting)" if self.notion_token and self.notion_database_id else "❌ Not configured"
+        self._drive_status = "✅ Enabled" if self.google_drive_enabled else "❌ Disabled"
+        self._heartbeat_status = "✅ Configured" if self.heartbeat_system else "❌ Not configured"
+        self._startup_banner = self._build_startup_banner()
+        
         # Configure events
         self._setup_events()
     
-    def _parse_channel_ids(self, channel_ids_str: str) -> List[str]:
-        """Parse comma-separated channel IDs, ignoring comments"""
-        if not channel_ids_str.strip():
-            return []
+    def _install_message_prefilter(self):
+        """
+        Drop MESSAGE_CREATE payloads from other servers before discord.py parses them
+        Skips building Message objects (author, embeds, attachments) for events we would discard anyway
+        """
+        parsers = getattr(getattr(self.client, '_connection', None), 'parsers', None)
+        if not isinstance(parsers, dict) or 'MESSAGE_CREATE' not in parsers:
+            logger.warning("⚠️ Message pre-filter not installed (unsupported discord.py version)")
+            return
         
-        # Remove comments (everything after #)
-        clean_str = channel_ids_str.split('#')[0].strip()
+        parse_message_create = parsers['MESSAGE_CREATE']
+        target_guild_id = str(self._target_server_id_int)  # Raw payloads carry IDs as strings
         
-        if not clean_str:
-            return []
-            
-        return [cid.strip() for cid in clean_str.split(',') if cid.strip()]
-    
+        def _parse_target_guild_messages(data):
+            if data.get('guild_id') == target_guild_id:
+                parse_message_create(data)
+        
+        parsers['MESSAGE_CREATE'] = _parse_target_guild_messages
+
     def _setup_events(self):
         """Configure Discord event handlers"""
         
         @self.client.event
         async def on_ready():
             if self.client.user:
-                print(f"🤖 Bot connected as: {self.client.user}")
-                print(f"🆔 User ID: {self.client.user.id}")
-            print(f"📝 Monitoring server: {self.target_server_id}")
+                logger.info("🤖 Bot connected as: %s", self.client.user)
+                logger.info("🆔 User ID: %s", self.client.user.id)
+            logger.info("📝 Monitoring server: %s", self.target_server_id)
             
             if self.target_channel_ids:
-                print(f"📋 Specific channels: {', '.join(self.target_channel_ids)}")
+                logger.info("📋 Specific channels: %s", ', '.join(map(str, self.target_channel_ids)))
             else:
-                print("📋 Monitoring ALL channels in the server")
+                logger.info("📋 Monitoring ALL channels in the server")
             
-            print(f"📁 Saving messages to: {self.log_file}")
-            print("🎯 Real-time monitoring mode: Listening for new messages...")
+            logger.info("📁 Saving messages to: %s", self.jsonl_log_file)
+            logger.info("🎯 Real-time monitoring mode: Listening for new messages...")
             
             # Start heartbeat system
             if self.heartbeat_system:
-                print("💓 Starting heartbeat system...")
+                logger.info("💓 Starting heartbeat system...")
                 asyncio.create_task(self.heartbeat_system.start_heartbeat())
 
             # Record bot start in activity tracker
             if self.activity_tracker:
                 self.activity_tracker.record_bot_start()
-                print("📊 Activity tracking started")
+                logger.info("📊 Activity tracking started")
+                if self.activity_tracker.first_start_time:
+                    self._bot_start_snowflake = discord.utils.time_snowflake(self.activity_tracker.first_start_time)
+            
+            # Start background Notion writer
+            if self.notion_token and self.notion_database_id:
+                self._start_notion_worker()
+                # Prefill the lookup cache once (on_ready also fires after reconnects),
+                # unless the previous run's snapshot already did
+                if self._notion_warm_task is None and not self._notion_url_cache:
+                    self._notion_warm_task = asyncio.create_task(self._warm_notion_url_cache())
+            
+            # Start the backup log writer and its periodic flush
+            if not self._jsonl_writer_task or self._jsonl_writer_task.done():
+                self._jsonl_writer_task = asyncio.create_task(self._jsonl_writer())
+            if not self._log_flush_task or self._log_flush_task.done():
+                self._log_flush_task = asyncio.create_task(self._flush_log_periodically())
             
             # Initialize Google Drive if enabled
             if self.google_drive_manager:
-                print("☁️ Initializing Google Drive...")
+                logger.info("☁️ Initializing Google Drive...")
                 drive_success = await self.google_drive_manager.initialize()
                 if drive_success:
-                    print("✅ Google Drive initialized successfully")
+                    logger.info("✅ Google Drive initialized successfully")
                 else:
-                    print("❌ Google Drive initialization failed")
+                    logger.error("❌ Google Drive initialization failed")
                     self.google_drive_manager = None
             
-            print("-" * 60)
+            logger.info("-" * 60)
             
             # Check if target server exists
             target_server = self._get_target_server()
             if target_server:
-                print(f"✅ Server found: {target_server.name}")
+                logger.info("✅ Server found: %s", target_server.name)
                 if hasattr(target_server, 'member_count'):
-                    print(f"👥 Members: {target_server.member_count}")
-                print("-" * 60)
+                    logger.info("👥 Members: %s", target_server.member_count)
+                logger.info("-" * 60)
                 
                 # Start real-time monitoring
                 self.is_monitoring = True
-                print("🎯 Bot is now monitoring for new messages...")
-                print("💡 The bot will now process ALL NEW MESSAGES in real-time (INCLUDING OWN MESSAGES)")
-                print("⚠️  WARNING: Self-monitoring is enabled - be careful with automated responses!")
-                print("💡 To stop the bot, press Ctrl+C")
-                print("-" * 60)
+                logger.info("🎯 Bot is now monitoring for new messages...")
+                logger.info("💡 The bot will now process ALL NEW MESSAGES in real-time (INCLUDING OWN MESSAGES)")
+                logger.warning("⚠️  WARNING: Self-monitoring is enabled - be careful with automated responses!")
+                logger.info("💡 To stop the bot, press Ctrl+C")
+                logger.info("-" * 60)
                 
                 # Send startup heartbeat
                 if self.heartbeat_system:
-                    await self.heartbeat_system.send_ping("success", "Bot started successfully - monitoring new messages")
+                    self.heartbeat_system.queue_ping("success", "Bot started successfully - monitoring new messages")
             else:
-                print(f"❌ Server not found! Check the server ID.")
-                print("-" * 60)
+                logger.error("❌ Server not found! Check the server ID.")
+                logger.info("-" * 60)
                 await self.client.close()
         
         @self.client.event
         async def on_error(event, *args, **kwargs):
-            print(f"❌ Error in event {event}: {args}")
+            logger.error("❌ Error in event %s: %s", event, args)
             
             # Send error ping to heartbeat system
             if self.heartbeat_system:
-                await self.heartbeat_system.send_ping("fail", f"Error in event {event}: {str(args)[:100]}")
+                self.heartbeat_system.queue_ping("fail", f"Error in event {event}: {args!s:.100}")
         
         @self.client.event
         async def on_disconnect():
-            print("🔌 Bot disconnected")
+            logger.info("🔌 Bot disconnected")
             
             # Send disconnect ping
             if self.heartbeat_system:
-                await self.heartbeat_system.send_ping("fail", "Bot disconnected from Discord")
+                self.heartbeat_system.queue_ping("fail", "Bot disconnected from Discord")
         
         @self.client.event
         async def on_resumed():
-            print("🔄 Connection resumed")
+            logger.info("🔄 Connection resumed")
             
             # Send reconnect ping
             if self.heartbeat_system:
-                await self.heartbeat_system.send_ping("success", "Connection resumed successfully")
+                self.heartbeat_system.queue_ping("success", "Connection resumed successfully")
+        
+        @self.client.event
+        async def on_guild_channel_update(before, after):
+            # Channel renamed or moved to another category
+            self._page_templates.pop((after.guild.id, after.id), None)
+            # Category renamed: its child channels carry the old name in their templates
+            if isinstance(after, discord.CategoryChannel):
+                for channel in after.channels:
+                    self._page_templates.pop((after.guild.id, channel.id), None)
+        
+        @self.client.event
+        async def on_guild_update(before, after):
+            # Server renamed: rebuild every template for it
+            for key in [key for key in self._page_templates if key[0] == after.id]:
+                del self._page_templates[key]
         
         @self.client.event
         async def on_message(message: discord.Message):
@@ -304,26 +576,11 @@ class SimpleMessageListener:
                 return
             
             try:
-                print(f"📨 New message from @{message.author.name} in #{getattr(message.channel, 'name', 'DM')}")
+                logger.info("📨 New message from @%s in #%s", message.author.name, getattr(message.channel, 'name', 'DM'))
                 
-                # Process the message with retry logic for rate limits
-                max_retries = 3
-                for attempt in range(1, max_retries + 1):
-                    try:
-                        await self._log_message(message)
-                        break  # Success, exit retry loop
-                    except Exception as msg_error:
-                        # Check if it's a rate limit error
-                        if await self._handle_rate_limit_error(msg_error, attempt):
-                            if attempt < max_retries:
-                                print(f"🔄 Retrying message processing (attempt {attempt + 1}/{max_retries})")
-                                continue
-                            else:
-                                print(f"❌ Max retries reached for message {message.id}")
-                                raise msg_error
-                        else:
-                            # Not a rate limit error, re-raise immediately
-                            raise msg_error
+                # Hand the message off to the Notion queue (rate-limit retries
+                # happen in the background worker, not in the event handler)
+                await self._log_message(message)
                 
                 self.processed_messages += 1
 
@@ -333,256 +590,368 @@ class SimpleMessageListener:
 
                 # Show progress every 10 messages (less frequent for real-time)
                 if self.processed_messages % 10 == 0:
-                    print(f"📊 Progress: {self.processed_messages} messages processed...")
+                    logger.info("📊 Progress: %s messages processed...", self.processed_messages)
                 
                 # Send progress heartbeat every 50 messages
                 if self.heartbeat_system and self.processed_messages % 50 == 0:
                     progress_msg = f"Processed {self.processed_messages} messages, failed: {self.failed_messages}"
-                    await self.heartbeat_system.send_ping("success", progress_msg)
-                
-                # Smaller delay for real-time processing (to prevent rate limiting)
-                await asyncio.sleep(0.2)  # 200ms delay between message processing
+                    self.heartbeat_system.queue_ping("success", progress_msg)
                 
             except Exception as e:
-                print(f"❌ Error processing message {message.id}: {e}")
+                logger.error("❌ Error processing message %s: %s", message.id, e)
                 self.failed_messages += 1
                 
                 # Send error heartbeat for critical failures
                 if self.heartbeat_system:
-                    await self.heartbeat_system.send_ping("fail", f"Message processing error: {str(e)[:100]}")
+                    self.heartbeat_system.queue_ping("fail", f"Message processing error: {e!s:.100}")
     
     def _should_monitor_message(self, message: discord.Message) -> bool:
         """Determine if the message should be logged"""
-        # Ignore messages without guild (DMs) unless specifically configured
-        if not message.guild:
-            return False
-            
-        # Check if message is from the target server
-        if str(message.guild.id) != self.target_server_id:
+        # Ignore DMs and messages from other servers (integer compare, no str() per event)
+        if not message.guild or message.guild.id != self._target_server_id_int:
             return False
         
-        # If specific channels are configured, check if message is from one of them
-        if self.target_channel_ids:
-            return str(message.channel.id) in self.target_channel_ids
-        
-        # If no specific channels, monitor all channels in the server
-        return True
+        # If specific channels are configured, check if message is from one of them;
+        # otherwise monitor all channels in the server
+        return not self.target_channel_ids or message.channel.id in self.target_channel_ids
     
     def _get_target_server(self) -> Optional[discord.Guild]:
         """Get the target server for monitoring"""
-        if not self.target_server_id or not self.target_server_id.isdigit():
-            return None
-        return discord.utils.get(self.client.guilds, id=int(self.target_server_id))
+        return self.client.get_guild(self._target_server_id_int)
     
     async def _handle_rate_limit_error(self, error: Exception, attempt: int = 1):
         """
         Handle rate limiting errors with exponential backoff
         """
-        if "429" in str(error) or "Too Many Requests" in str(error):
-            # Exponential backoff: 2^attempt seconds
-            backoff_delay = min(2 ** attempt, 60)  # Max 60 seconds
-            print(f"⚠️ Rate limit hit! Backing off for {backoff_delay} seconds (attempt {attempt})")
+        if isinstance(error, NotionAPIError) and error.status == 429 or "Too Many Requests" in str(error):
+            # Notion's Retry-After when given, otherwise exponential backoff: 2^attempt seconds
+            retry_after = getattr(error, 'retry_after', None)
+            backoff_delay = retry_after if retry_after is not None else min(2 ** attempt, 60)  # Max 60 seconds
+            # Up to 25% jitter so concurrent saves that hit 429 together don't retry in lockstep
+            backoff_delay = round(backoff_delay * (1 + random.random() * 0.25), 2)
+            logger.warning("⚠️ Rate limit hit! Backing off for %s seconds (attempt %s)", backoff_delay, attempt)
             
             # Send rate limit warning to heartbeat
             if self.heartbeat_system:
-                await self.heartbeat_system.send_ping("fail", f"Rate limit hit, backing off {backoff_delay}s")
+                self.heartbeat_system.queue_ping("fail", f"Rate limit hit, backing off {backoff_delay}s")
             
             await asyncio.sleep(backoff_delay)
             return True
         return False
 
-    async def _smart_delay(self, message_count: int):
-        """
-        Intelligent delay system to prevent rate limiting
-        Adapts delay based on processing volume and adds randomization
-        """
-        base_delay = 0.5  # 2 requests/second base (much safer than 0.1s)
-        
-        if message_count % 100 == 0:
-            # Longer pause every 100 messages for cooling down
-            delay = base_delay * 2
-            print(f"🛑 Extended cooling period (100 messages): {delay}s")
-            await asyncio.sleep(delay)
-        elif message_count % 50 == 0:
-            # Medium pause every 50 messages
-            delay = base_delay * 1.5
-            print(f"⏸️ Medium pause (50 messages): {delay}s")
-            await asyncio.sleep(delay)
-        else:
-            # Regular delay with randomization to avoid patterns
-            random_offset = random.uniform(0, 0.3)
-            delay = base_delay + random_offset
-            await asyncio.sleep(delay)
+    @staticmethod
+    def _notion_page_url(page_id: str) -> str:
+        """Build the public Notion URL for a page ID"""
+        return 'https://www.notion.so/' + page_id.translate(_NO_DASH)
 
-    async def _upload_file_to_notion_official(self, temp_path: str, filename: str, message_id: str) -> Optional[dict]:
+    def _cache_notion_url(self, message_id: str, page_url: Optional[str]):
+        """Remember a Discord message -> Notion page mapping (LRU, misses expire)"""
+        expires_at = time.monotonic() + self._notion_miss_ttl if page_url is None else None
+        self._notion_url_cache[message_id] = (page_url, expires_at)
+        self._notion_url_cache.move_to_end(message_id)
+        while len(self._notion_url_cache) > self._notion_url_cache_size:
+            self._notion_url_cache.popitem(last=False)
+
+    def _get_cached_notion_url(self, message_id: str) -> Tuple[bool, Optional[str]]:
+        """Return (hit, page_url) from the lookup cache"""
+        entry = self._notion_url_cache.get(message_id)
+        if entry is None:
+            return False, None
+        
+        page_url, expires_at = entry
+        if expires_at is not None and expires_at < time.monotonic():
+            del self._notion_url_cache[message_id]
+            return False, None
+        
+        self._notion_url_cache.move_to_end(message_id)
+        return True, page_url
+
+    async def _warm_notion_url_cache(self):
         """
-        Upload file directly to Notion using the official quickUpload function
-        Returns file object that can be used in Notion properties
+        Prefill the lookup cache with the most recently logged messages, 100 pages per query
+        Replies mostly target recent messages, so their parent lookups become cache hits.
+        Limited to _WARM_MAX_QUERIES and paused while messages wait, so it never delays live writes
         """
+        payload = {"sorts": [{"timestamp": "created_time", "direction": "descending"}], "page_size": 100}
+        loaded = 0
         try:
-            print(f"📁 Uploading {filename} directly to Notion via official API...")
+            for _ in range(_WARM_MAX_QUERIES):
+                if len(self._notion_url_cache) >= self._notion_url_cache_size:
+                    break
+                # Queued messages go first: they share the same Notion rate budget
+                while self._notion_queue is not None and self._notion_queue.qsize():
+                    await asyncio.sleep(1)
+                response = await self._notion_request('POST', f'databases/{self.notion_database_id}/query', payload)
+                for page in response['results']:
+                    rich_text = page['properties'].get('Message ID', {}).get('rich_text')
+                    if not rich_text:
+                        continue
+                    message_id = rich_text[0]['plain_text']
+                    # Entries cached since startup are fresher; older pages go to the LRU end evicted first
+                    if message_id not in self._notion_url_cache:
+                        self._notion_url_cache[message_id] = (self._notion_page_url(page['id']), None)
+                        self._notion_url_cache.move_to_end(message_id, last=False)
+                        loaded += 1
+                
+                if not response.get('has_more'):
+                    break
+                payload['start_cursor'] = response['next_cursor']
             
-            if not self.notion_token:
-                print("❌ No Notion token available")
-                return None
+            logger.info("📇 Notion lookup cache warmed with %d messages", loaded)
+        except Exception as e:
+            logger.warning("⚠️ Could not warm Notion lookup cache: %s", e)
+
+    def _load_notion_url_cache(self):
+        """Fill the lookup cache from the snapshot saved by the previous run, if any"""
+        try:
+            with open(self._notion_url_cache_file, 'rb') as f:
+                snapshot = orjson.loads(f.read())
             
-            # Use the official 3-step API process
-            return await self._upload_file_direct_to_notion(temp_path, filename, message_id)
-                        
+            # Pages from another database (NOTION_DATABASE_ID changed) or a stale run are never reused
+            if not isinstance(snapshot, dict) or snapshot.get("database_id") != self.notion_database_id:
+                logger.info("📇 Notion lookup cache snapshot is from another database or format, ignoring it")
+                return
+            if time.time() - snapshot.get("saved_at", 0) > _URL_CACHE_SNAPSHOT_MAX_AGE:
+                logger.info("📇 Notion lookup cache snapshot is too old, ignoring it")
+                return
+            
+            # Saved least recently used first, so LRU order carries over
+            for message_id, page_url in snapshot["entries"][-self._notion_url_cache_size:]:
+                self._notion_url_cache[message_id] = (page_url, None)
+        except FileNotFoundError:
+            return
         except Exception as e:
-            print(f"❌ Error uploading {filename} to Notion: {e}")
-            return None
+            # Unreadable or wrong shape: start empty so on_ready warms the cache from Notion
+            self._notion_url_cache.clear()
+            logger.warning("⚠️ Could not load Notion lookup cache snapshot: %s", e)
+            return
+        logger.info("📇 Notion lookup cache restored with %d messages", len(self._notion_url_cache))
+
+    def _save_notion_url_cache(self):
+        """Write the found (non-negative) lookups to the snapshot file, replacing it atomically"""
+        entries = [(message_id, page_url) for message_id, (page_url, _) in self._notion_url_cache.items() if page_url]
+        if not entries:
+            return
+        snapshot = {"database_id": self.notion_database_id, "saved_at": time.time(), "entries": entries}
+        temp_path = self._notion_url_cache_file + '.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(orjson.dumps(snapshot))
+        os.replace(temp_path, self._notion_url_cache_file)
 
-    async def _upload_file_to_existing_page(self, temp_path: str, filename: str, page_id: str) -> Optional[dict]:
+    async def _get_notion_http(self) -> aiohttp.ClientSession:
+        """Return the shared Notion REST session, creating it on first use"""
+        if self._notion_http is None or self._notion_http.closed:
+            self._notion_http = aiohttp.ClientSession(
+                headers={
+                    'Authorization': f'Bearer {self.notion_token}',
+                    'Notion-Version': '2022-06-28',
+                    'Content-Type': 'application/json'
+                },
+                connector=aiohttp.TCPConnector(limit=32, keepalive_timeout=75),
+                timeout=aiohttp.ClientTimeout(total=30)
+            )
+            self._notion_sem = asyncio.Semaphore(self._notion_max_concurrency)
+        return self._notion_http
+
+    async def _get_http_session(self) -> aiohttp.ClientSession:
+        """Return the shared attachment download session, creating it on first use"""
+        if self.http_session is None or self.http_session.closed:
+            self.http_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=32, limit_per_host=8, ttl_dns_cache=300)
+            )
+        return self.http_session
+
+    async def _notion_request(self, method: str, path: str, payload: Optional[dict] = None) -> dict:
         """
-        Upload file to an existing Notion page using the quickUpload function
+        Call the Notion REST API without going through the blocking SDK
+        Raises NotionAPIError on non-200 responses (status included so rate limits are detected)
         """
+        session = await self._get_notion_http()
+        # orjson (C extension) keeps large page payloads from stalling the event loop
+        data = orjson.dumps(payload) if payload is not None else None
+        async with self._notion_sem:
+            await self._pace_notion_request()
+            async with session.request(method, f'https://api.notion.com/v1/{path}', data=data) as response:
+                raw = await response.read()
+        if response.status == 200:
+            return orjson.loads(raw)
+        
+        # Error bodies are not always JSON (e.g. an HTML 502/504 from Notion's edge): keep the status either way
         try:
+            body = orjson.loads(raw)
+            message = body.get('message', '') if isinstance(body, dict) else ''
+        except orjson.JSONDecodeError:
+            message = raw[:200].decode('utf-8', 'replace').strip()
+        retry_after = None
+        if response.status == 429:
+            try:
+                retry_after = float(response.headers.get('Retry-After', 1))
+            except ValueError:
+                retry_after = 1.0  # HTTP-date or other non-numeric value: same default as a missing header
+            # Hold every writer's next start slot until Notion's cooldown has passed
+            self._notion_next_slot = max(self._notion_next_slot, time.monotonic() + retry_after)
+        raise NotionAPIError(response.status, message, retry_after)
+
+    async def _pace_notion_request(self):
+        """
+        Space Notion request starts NOTION_RATE_LIMIT per second apart
+        Concurrent writers fill Notion's rate budget instead of bursting into 429s
+        """
+        now = time.monotonic()
+        slot = max(now, self._notion_next_slot)
+        self._notion_next_slot = slot + self._notion_request_interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    async def _upload_file_to_notion_official(self, source: Union[str, bytes], filename: str, message_id: str, mime_type: Optional[str] = None) -> Optional[dict]:
+        """
+        Upload file directly to Notion using the official Direct Upload API
+        Returns file object that can be used in Notion properties
+        """
+        try:
+            logger.info("📁 Uploading %s directly to Notion via official API...", filename)
+            
             if not self.notion_token:
-                print("❌ No Notion token available")
+                logger.error("❌ No Notion token available")
                 return None
             
-            print(f"📁 Uploading {filename} to existing Notion page via quickUpload...")
-            
-            # Use quickUpload function in a thread to avoid blocking
-            def _upload_sync():
-                # Type assertion since we've already checked that notion_token is not None
-                notion_token: str = self.notion_token  # type: ignore
-                return quickUpload(temp_path, page_id, notion_token)
-            
-            result = await asyncio.to_thread(_upload_sync)
-            
-            if result:
-                print(f"✅ File uploaded to existing page successfully: {filename}")
-            else:
-                print(f"❌ Failed to upload {filename} to existing page")
-            
-            return result
+            # Use the official 3-step API process
+            return await self._upload_file_direct_to_notion(source, filename, message_id, mime_type)
                         
         except Exception as e:
-            print(f"❌ Error uploading {filename} to existing page: {e}")
+            logger.error("❌ Error uploading %s to Notion: %s", filename, e)
             return None
 
-    async def _upload_file_direct_to_notion(self, temp_path: str, filename: str, message_id: str) -> Optional[dict]:
+    async def _upload_file_direct_to_notion(self, source: Union[str, bytes], filename: str, message_id: str, mime_type: Optional[str] = None) -> Optional[dict]:
         """
         Upload file directly to Notion using the official Direct Upload API (3-step process)
+        source is the file's bytes, or the path of a spilled temp file
         """
         try:
-            headers = {
-                'Authorization': f'Bearer {self.notion_token}',
-                'Notion-Version': '2022-06-28'
-            }
+            # Step 1: Create file upload object (empty body)
+            logger.info("📁 Step 1: Creating file upload object for %s...", filename)
+            upload_data = await self._notion_request('POST', 'file_uploads', {})
+            upload_id = upload_data.get('id')
+            upload_url = upload_data.get('upload_url')
+            
+            if not upload_id or not upload_url:
+                logger.error("❌ No upload ID or upload URL in response")
+                return None
             
-            async with aiohttp.ClientSession() as session:
-                # Step 1: Create file upload object (empty body)
-                print(f"📁 Step 1: Creating file upload object for {filename}...")
-                async with session.post(
-                    'https://api.notion.com/v1/file_uploads',
-                    headers={**headers, 'Content-Type': 'application/json'},
-                    json={}  # Empty body as per official docs
-                ) as response:
-                    if response.status != 200:
-                        response_text = await response.text()
-                        print(f"❌ Failed to create file upload: {response.status} - {response_text}")
-                        return None
-                    
-                    upload_data = await response.json()
-                    upload_id = upload_data.get('id')
-                    upload_url = upload_data.get('upload_url')
-                    
-                    if not upload_id or not upload_url:
-                        print("❌ No upload ID or upload URL in response")
-                        return None
-                    
-                    print(f"✅ File upload object created with ID: {upload_id}")
-                    
-                    # Step 2: Upload file content using multipart/form-data
-                    print(f"📁 Step 2: Uploading file content...")
-                    
-                    # Read file content
-                    def _read_file_content():
-                        with open(temp_path, 'rb') as f:
-                            return f.read()
-                    
-                    file_content = await asyncio.to_thread(_read_file_content)
-                    
-                    # Create multipart form data
-                    form_data = aiohttp.FormData()
-                    mime_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
-                    form_data.add_field('file', file_content, filename=filename, content_type=mime_type)
-                    
-                    # Upload the file (don't set Content-Type header, let aiohttp handle multipart boundary)
-                    upload_headers = {k: v for k, v in headers.items() if k != 'Content-Type'}
+            logger.info("✅ File upload object created with ID: %s", upload_id)
+            
+            # Step 2: Upload file content using multipart/form-data; temp files are streamed
+            # from disk in chunks by aiohttp rather than read into memory first
+            logger.info("📁 Step 2: Uploading file content...")
+            session = await self._get_notion_http()
+            # Discord's reported content type when the caller has it; otherwise guess from the name
+            mime_type = mime_type or mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+            
+            file_handle = None if isinstance(source, bytes) else await asyncio.to_thread(open, source, 'rb')
+            try:
+                form_data = aiohttp.FormData()
+                form_data.add_field('file', source if file_handle is None else file_handle, filename=filename, content_type=mime_type)
+                multipart = form_data()
+                
+                # The session defaults to a JSON Content-Type; override it with the multipart boundary
+                async with self._notion_sem:
+                    await self._pace_notion_request()
                     async with session.post(
                         upload_url,  # This should be something like /v1/file_uploads/{id}/send
-                        headers=upload_headers,
-                        data=form_data
+                        headers={'Content-Type': multipart.content_type},
+                        data=multipart
                     ) as upload_response:
                         if upload_response.status not in [200, 201]:
                             upload_text = await upload_response.text()
-                            print(f"❌ File upload failed: {upload_response.status} - {upload_text}")
+                            logger.error("❌ File upload failed: %s - %s", upload_response.status, upload_text)
                             return None
-                        
-                        upload_result = await upload_response.json()
-                        print(f"✅ File uploaded successfully: {filename}")
-                        
-                        # Step 3: Return file upload object for Notion properties
-                        # The file can now be attached using the upload_id
-                        file_info = {
-                            "type": "file_upload",
-                            "file_upload": {
-                                "id": upload_id
-                            },
-                            "name": filename
-                        }
-                        
-                        print(f"✅ File ready for attachment with ID: {upload_id}")
-                        return file_info
+            finally:
+                if file_handle is not None:
+                    file_handle.close()
+            
+            logger.info("✅ File uploaded successfully: %s", filename)
+            
+            # Step 3: Return file upload object for Notion properties
+            # The file can now be attached using the upload_id
+            file_info = {
+                "type": "file_upload",
+                "file_upload": {
+                    "id": upload_id
+                },
+                "name": filename
+            }
+            
+            logger.info("✅ File ready for attachment with ID: %s", upload_id)
+            return file_info
                         
         except Exception as e:
-            print(f"❌ Error in direct Notion upload: {e}")
+            logger.error("❌ Error in direct Notion upload: %s", e)
             return None
 
     async def _find_message_in_notion(self, message_id: str) -> Optional[str]:
         """
         Search for a message in Notion by its ID and return the Notion page URL
         """
-        if not self.notion_client or not self.notion_database_id:
+        if not self.notion_token or not self.notion_database_id:
             return None
         
+        # Parents written or looked up earlier in this session skip the query
+        cache_hit, cached_url = self._get_cached_notion_url(message_id)
+        if cache_hit:
+            return cached_url
+        
+        # Parents sent before the bot ever started logging are a guaranteed miss
+        if int(message_id) < self._bot_start_snowflake:
+            return None
+        
+        # A burst of replies to the same parent awaits the lookup already in flight
+        pending = self._inflight_lookups.get(message_id)
+        if pending is not None:
+            return await asyncio.shield(pending)
+        
+        future = asyncio.get_running_loop().create_future()
+        self._inflight_lookups[message_id] = future
         try:
-            # Search Notion database using message ID
-            query_filter = {
-                "property": "Message ID",
-                "title": {
-                    "equals": message_id
-                }
-            }
-            
-            print(f"🔍 Searching message in Notion: {message_id}")
+            page_url = await self._query_notion_for_message(message_id)
+            future.set_result(page_url)
+            return page_url
+        finally:
+            if not future.done():
+                future.set_result(None)
+            del self._inflight_lookups[message_id]
+    
+    async def _query_notion_for_message(self, message_id: str) -> Optional[str]:
+        """
+        Query the Notion database for a Discord message ID and cache the outcome
+        """
+        try:
+            logger.debug("🔍 Searching message in Notion: %s", message_id)
             
-            # Query in a thread to avoid blocking the event loop
-            response = await asyncio.to_thread(
-                self.notion_client.databases.query,
-                database_id=self.notion_database_id,
-                filter=query_filter
+            # Query the REST API directly over the shared aiohttp session;
+            # message IDs are unique, so Notion can stop at the first match
+            response = await self._notion_request(
+                'POST',
+                f'databases/{self.notion_database_id}/query',
+                {
+                    "filter": {"property": "Message ID", "rich_text": {"equals": message_id}},
+                    "page_size": 1
+                }
             )
             
-            # Access results directly (notion-client 2.2.1 returns a dict)
-            results = response['results']  # type: ignore
+            results = response['results']
             
             if results and len(results) > 0:
-                page_id = results[0]['id']
-                # Generate Notion page URL
-                page_url = f"https://www.notion.so/{page_id.replace('-', '')}"
-                print(f"✅ Message found in Notion: {page_url}")
+                page_url = self._notion_page_url(results[0]['id'])
+                logger.info("✅ Message found in Notion: %s", page_url)
+                self._cache_notion_url(message_id, page_url)
                 return page_url
             else:
-                print(f"❌ Message not found in Notion: {message_id}")
+                logger.info("❌ Message not found in Notion: %s", message_id)
+                self._cache_notion_url(message_id, None)
                 return None
             
         except Exception as e:
-            print(f"❌ Error searching message in Notion: {e}")
+            logger.error("❌ Error searching message in Notion: %s", e)
             return None
     
     async def _process_attachment_with_tempfile(self, attachment: discord.Attachment, message_id: str) -> Optional[dict]:
@@ -591,45 +960,51 @@ class SimpleMessageListener:
         Returns file info with Google Drive URL or Discord URL as fallback
         Also determines if the file is an image for direct Notion upload
         """
+        # Owned by this call until file_info hands them to the caller
+        buffered_bytes = 0
+        temp_path = None
+        file_info = None
         try:
-            print(f"📥 Processing attachment: {attachment.filename}")
-            
-            # Create safe filename for extension detection
-            safe_filename = "".join(c for c in attachment.filename if c.isalnum() or c in (' ', '.', '_', '-')).rstrip()
+            logger.info("📥 Processing attachment: %s", attachment.filename)
             
             # Get file extension
-            _, ext = os.path.splitext(attachment.filename)
+            ext = os.path.splitext(attachment.filename)[1].lower()
             if not ext:
                 ext = '.tmp'
             
-            # Check if it's an image file
-            image_extensions = {'.jpg', '.jpeg', '.png', '.gif', '.webp', '.bmp', '.svg', '.tiff', '.tif'}
-            is_image = ext.lower() in image_extensions
-            
-            # Check if it's a video file
-            video_extensions = {'.mp4', '.mov', '.webm', '.mkv', '.avi', '.flv', '.wmv', '.m4v'}
-            is_video = ext.lower() in video_extensions
+            # Check if it's an image or video file
+            is_image = ext in _IMAGE_EXTENSIONS
+            is_video = ext in _VIDEO_EXTENSIONS
             
-            # Download file from Discord using temporary file
-            async with aiohttp.ClientSession() as session:
+            # Bounded across all writers: caps simultaneous CDN downloads and Drive uploads
+            async with self._upload_sem:
+                # Download file from Discord: into memory, or to a temporary file when large
+                session = await self._get_http_session()
                 async with session.get(attachment.url) as response:
                     if response.status == 200:
-                        # Use temporary file that will be automatically deleted
-                        with tempfile.NamedTemporaryFile(suffix=ext, delete=False) as temp_file:
-                            temp_path = temp_file.name
-                            
-                            # Download to temporary file
-                            async for chunk in response.content.iter_chunked(8192):
-                                temp_file.write(chunk)
-                        
-                        print(f"✅ Attachment downloaded to temporary file: {attachment.filename}")
+                        if attachment.size <= _SPILL_THRESHOLD and self._buffered_bytes + attachment.size <= _BUFFER_BUDGET:
+                            # Reserved until the Notion upload finishes (released by _release_buffers)
+                            buffered_bytes = attachment.size
+                            self._buffered_bytes += buffered_bytes
+                            temp_path = None
+                            source = await response.read()
+                            logger.info("✅ Attachment downloaded: %s", attachment.filename)
+                        else:
+                            # Removed by _cleanup_temp_files once the uploads are done.
+                            # File I/O goes through to_thread so large spills never block the event loop
+                            temp_file = await asyncio.to_thread(tempfile.NamedTemporaryFile, suffix=ext, delete=False)
+                            temp_path = source = temp_file.name
+                            try:
+                                async for chunk in response.content.iter_chunked(_DOWNLOAD_CHUNK_SIZE):
+                                    await asyncio.to_thread(temp_file.write, chunk)
+                            finally:
+                                await asyncio.to_thread(temp_file.close)
                         
-                        # Get file info using async file operations
-                        def _get_file_size():
-                            return os.path.getsize(temp_path)
+                            logger.info("✅ Attachment downloaded to temporary file: %s", attachment.filename)
                         
-                        file_size = await asyncio.to_thread(_get_file_size)
-                        mime_type, _ = mimetypes.guess_type(attachment.filename)
+                        # Discord already reports the size; no need to stat the temp file in a thread
+                        file_size = attachment.size
+                        mime_type = attachment.content_type or mimetypes.guess_type(attachment.filename)[0]
                         
                         # Try to upload to Google Drive if enabled
                         google_drive_info = None
@@ -637,9 +1012,9 @@ class SimpleMessageListener:
                         upload_method = "discord"
                         
                         if self.google_drive_manager and self.google_drive_manager.is_initialized():
-                            print(f"☁️ Uploading {attachment.filename} to Google Drive...")
+                            logger.info("☁️ Uploading %s to Google Drive...", attachment.filename)
                             google_drive_info = await self.google_drive_manager.upload_file(
-                                temp_path, 
+                                source, 
                                 attachment.filename, 
                                 message_id
                             )
@@ -647,19 +1022,20 @@ class SimpleMessageListener:
                             if google_drive_info:
                                 final_url = google_drive_info['shareable_link']
                                 upload_method = "google_drive"
-                                print(f"✅ File uploaded to Google Drive: {attachment.filename}")
+                                logger.info("✅ File uploaded to Google Drive: %s", attachment.filename)
                             else:
-                                print(f"⚠️ Google Drive upload failed, using Discord URL: {attachment.filename}")
+                                logger.warning("⚠️ Google Drive upload failed, using Discord URL: %s", attachment.filename)
                         else:
-                            print(f"⚠️ Google Drive not available, using Discord URL: {attachment.filename}")
+                            logger.warning("⚠️ Google Drive not available, using Discord URL: %s", attachment.filename)
                         
                         file_info = {
                             "filename": attachment.filename,
-                            "safe_filename": safe_filename,
                             "original_url": attachment.url,
                             "final_url": final_url,
                             "upload_method": upload_method,
+                            "source": source,  # Bytes, or the temp file path for large attachments
                             "temp_path": temp_path,
+                            "buffered_bytes": buffered_bytes,  # Share of _BUFFER_BUDGET held by source
                             "size": file_size,
                             "discord_size": attachment.size,
                             "mime_type": mime_type or 'application/octet-stream',
@@ -668,162 +1044,174 @@ class SimpleMessageListener:
                             "google_drive_info": google_drive_info,
                             "is_image": is_image,
                             "is_video": is_video,
-                            "extension": ext.lower(),
-                            "cleanup_needed": True  # Mark for cleanup after Notion upload
+                            "extension": ext,
+                            "cleanup_needed": temp_path is not None  # Mark for cleanup after Notion upload
                         }
                         
-                        # Note: Don't clean up temp file yet - we might need it for direct Notion upload
+                        # Note: Keep the source until the Notion uploads are done
                         return file_info
                     else:
-                        print(f"❌ Failed to download attachment: HTTP {response.status}")
+                        logger.error("❌ Failed to download attachment: HTTP %s", response.status)
                         return None
                         
         except Exception as e:
-            print(f"❌ Error processing attachment {attachment.filename}: {e}")
+            logger.error("❌ Error processing attachment %s: %s", attachment.filename, e)
             return None
+        finally:
+            # Failed or cancelled (CancelledError is not an Exception): give back the budget and drop the spill file
+            if file_info is None:
+                self._buffered_bytes -= buffered_bytes
+                if temp_path is not None:
+                    await self._cleanup_temp_files([temp_path])
     
-    async def _upload_image_to_notion(self, temp_path: str, filename: str) -> Optional[dict]:
+    def _release_buffers(self, file_infos: List[Optional[dict]]):
+        """Drop in-memory attachment bytes once uploaded and return their share of the buffer budget"""
+        for file_info in file_infos:
+            if file_info and file_info["buffered_bytes"]:
+                self._buffered_bytes -= file_info["buffered_bytes"]
+                file_info["buffered_bytes"] = 0
+                file_info["source"] = None
+    
+    async def _cleanup_temp_files(self, temp_file_paths: List[str]):
+        """Clean up temporary files asynchronously, all in a single thread hop"""
+        def _cleanup_files():
+            results = []
+            for temp_path in temp_file_paths:
+                try:
+                    os.unlink(temp_path)
+                    results.append((temp_path, None))
+                except OSError as e:
+                    results.append((temp_path, e))
+            return results
+
+        try:
+            results = await asyncio.to_thread(_cleanup_files)
+        except Exception as e:
+            logger.error("❌ Error cleaning up temp files %s: %s", temp_file_paths, e)
+            return
+
+        for temp_path, error in results:
+            if error is None:
+                logger.info("🧹 Temporary file cleaned up: %s", os.path.basename(temp_path))
+            else:
+                logger.warning("⚠️ Could not delete temporary file: %s - %s", temp_path, error)
+
+    def _get_page_template(self, message: discord.Message) -> dict:
         """
-        Upload image file directly to Notion using internal API (experimental)
-        This uses Notion's internal file upload endpoint that the web client uses
+        Return the Notion page scaffolding shared by every message in a channel
+        Built on first sight of the channel; dropped when the channel or server changes
         """
-        try:
-            print(f"🖼️ Attempting direct upload to Notion: {filename}")
-            
-            # Read file content
-            def _read_file_content():
-                with open(temp_path, 'rb') as f:
-                    return f.read()
-            
-            file_content = await asyncio.to_thread(_read_file_content)
-            
-            # Get file info
-            file_size = len(file_content)
-            mime_type, _ = mimetypes.guess_type(filename)
-            
-            # Try to use Notion's internal file upload API
-            # This is experimental and uses undocumented endpoints
-            notion_headers = {
-                'Authorization': f'Bearer {self.notion_token}',
-                'Notion-Version': '2022-06-28',
-                'Content-Type': 'application/json'
+        key = (message.guild.id if message.guild else None, message.channel.id)
+        template = self._page_templates.get(key)
+        if template is not None:
+            return template
+        
+        server_name = message.guild.name if message.guild else 'DM'
+        channel_name = getattr(message.channel, 'name', 'DM')
+        
+        # Get channel category (if exists); getattr with a default never raises
+        category = getattr(message.channel, 'category', None)
+        if category:
+            category_name = category.name
+            logger.debug("📂 Category detected: %s", category_name)
+        else:
+            category_name = "Sin categoría"
+            logger.debug("📂 No category found, using default: %s", category_name)
+        
+        template = {
+            "server_name": server_name,
+            "channel_name": channel_name,
+            "category_name": category_name,
+            "parent": {"database_id": self.notion_database_id},
+            "properties": {
+                "Server": {"select": {"name": server_name}},
+                "Channel": {"select": {"name": channel_name}},
+                "Category": {"select": {"name": category_name}}
             }
-            
-            try:
-                # Step 1: Request upload URL from Notion
-                async with aiohttp.ClientSession() as session:
-                    # First, get signed upload URL
-                    upload_request = {
-                        "name": filename,
-                        "contentType": mime_type or 'image/png'
-                    }
-                    
-                    async with session.post(
-                        'https://api.notion.com/v1/files',
-                        headers=notion_headers,
-                        json=upload_request
-                    ) as response:
-                        if response.status == 200:
-                            upload_data = await response.json()
-                            
-                            # Extract upload URL and file info
-                            if 'url' in upload_data:
-                                file_url = upload_data['url']
-                                
-                                print(f"✅ Got Notion upload URL for: {filename}")
-                                
-                                # Return file object for Notion
-                                return {
-                                    "name": filename,
-                                    "file": {
-                                        "url": file_url
-                                    }
-                                }
-                            else:
-                                print(f"⚠️ Notion didn't return upload URL for: {filename}")
-                                return None
-                        else:
-                            print(f"⚠️ Notion file upload request failed: {response.status}")
-                            return None
-                            
-            except Exception as upload_error:
-                print(f"⚠️ Notion direct upload failed: {upload_error}")
-                return None
-            
-        except Exception as e:
-            print(f"❌ Error in direct Notion upload: {e}")
-            return None
+        }
+        self._page_templates[key] = template
+        return template
 
-    async def _cleanup_temp_files(self, temp_file_paths: List[str]):
-        """Clean up temporary files asynchronously"""
-        for temp_path in temp_file_paths:
-            try:
-                def _cleanup_single_file():
-                    try:
-                        os.unlink(temp_path)
-                        return True
-                    except OSError as e:
-                        print(f"⚠️ Could not delete temporary file: {temp_path} - {e}")
-                        return False
-                
-                cleanup_success = await asyncio.to_thread(_cleanup_single_file)
-                if cleanup_success:
-                    print(f"🧹 Temporary file cleaned up: {os.path.basename(temp_path)}")
-                    
-            except Exception as e:
-                print(f"❌ Error cleaning up temp file {temp_path}: {e}")
+    def _extract_message_record(self, message: discord.Message) -> dict:
+        """
+        Compute the per-message fields shared by the Notion writer and the backup file log
+        Done once in _log_message so both paths reuse the same names, URLs and dates
+        """
+        # Get server/channel/category info (cached per channel)
+        template = self._get_page_template(message)
+        content = message.content or '[No text content]'
+        
+        # Check for URLs in content (only the first one is used)
+        url_match = _URL_RE.search(content)
+        
+        # Check if message is a reply
+        reference = message.reference
+        original_message_id = str(reference.message_id) if reference and reference.message_id else None
+        
+        return {
+            "template": template,
+            "server_name": template["server_name"],
+            "channel_name": template["channel_name"],
+            "category_name": template["category_name"],
+            "author_name": f"@{message.author.name}",
+            "content": content,
+            "message_id": str(message.id),
+            "attached_url": url_match.group(0) if url_match else None,
+            "message_url": message.jump_url,
+            "message_date": message.created_at.isoformat(),
+            "original_message_id": original_message_id
+        }
 
-    async def _save_message_to_notion(self, message: discord.Message):
+    async def _save_message_to_notion(self, message: discord.Message, record: Optional[dict] = None):
         """Save message to Notion database with support for replies"""
-        if not self.notion_client or not self.notion_database_id:
+        if not self.notion_token or not self.notion_database_id:
             return False
         
         try:
-            # Get message info
-            server_name = message.guild.name if message.guild else 'DM'
-            
-            try:
-                channel_name = getattr(message.channel, 'name', 'DM')
-            except:
-                channel_name = 'DM'
-            
-            # Get channel category (if exists)
-            category_name = None
-            try:
-                if hasattr(message.channel, 'category') and message.channel.category:
-                    category_name = message.channel.category.name
-                    print(f"📂 Category detected: {category_name}")
-                else:
-                    category_name = "Sin categoría"
-                    print(f"📂 No category found, using default: {category_name}")
-            except Exception as e:
-                category_name = "Sin categoría"
-                print(f"⚠️ Error getting category: {e}, using default")
-            
-            # Get author name
-            author_name = f"@{message.author.name}"
-            
-            content = message.content or '[No text content]'
-            
-            # Discord message ID
-            message_id = str(message.id)
-            
-            # Check for attachments and process them
-            has_attachment = len(message.attachments) > 0
+            if record is None:
+                record = self._extract_message_record(message)
+            template = record["template"]
+            server_name = record["server_name"]
+            channel_name = record["channel_name"]
+            author_name = record["author_name"]
+            content = record["content"]
+            message_id = record["message_id"]
+            attachments = message.attachments  # Read the discord.py attribute once
+            
+            # Truncate once for Notion's 2000-character rich text limit; shared by the callout and the Content property
+            notion_content = content if len(content) <= 2000 else content[:1997] + "..."
             
             # Process attachments - using temporary files
             attachment_files = []
             preview_images = []  # New list for Preview Images property
             temp_files_to_cleanup = []  # Track temp files for cleanup
             
-            if has_attachment:
-                for attachment in message.attachments:
-                    # Try to process the attachment with Google Drive integration
-                    file_info = await self._process_attachment_with_tempfile(attachment, message_id)
-                    
-                    # Small additional delay between attachment processing to prevent rate limiting
-                    await asyncio.sleep(0.2)  # 200ms between attachments
-                    
+            if attachments:
+                # Download (and Drive-upload) all attachments concurrently, bounded by _upload_sem;
+                # results keep attachment order
+                file_infos = await asyncio.gather(*(
+                    self._process_attachment_with_tempfile(attachment, message_id)
+                    for attachment in attachments
+                ))
+                
+                # Then upload them to Notion concurrently (bounded by the Notion semaphore and pacing)
+                async def _upload_to_notion(file_info):
+                    if not file_info:
+                        return None
+                    return await self._upload_file_to_notion_official(
+                        file_info['source'], 
+                        file_info['filename'],
+                        message_id,
+                        file_info['mime_type']
+                    )
+                
+                try:
+                    direct_notion_files = await asyncio.gather(*(_upload_to_notion(file_info) for file_info in file_infos))
+                finally:
+                    # Not needed for the page create (and its retries): free the bytes now
+                    self._release_buffers(file_infos)
+                
+                for attachment, file_info, direct_notion_file in zip(attachments, file_infos, direct_notion_files):
                     if file_info:
                         # Successfully processed (either Google Drive or Discord URL)
                         upload_method = file_info.get('upload_method', 'discord')
@@ -831,7 +1219,7 @@ class SimpleMessageListener:
                         is_image = file_info.get('is_image', False)
                         is_video = file_info.get('is_video', False)
                         
-                        print(f"✅ Attachment processed ({upload_method}): {file_info['filename']}")
+                        logger.info("✅ Attachment processed (%s): %s", upload_method, file_info['filename'])
                         
                         # Create Notion file object with the final URL (Google Drive or Discord)
                         file_entry = {
@@ -843,17 +1231,10 @@ class SimpleMessageListener:
                         
                         # If it's an image, add to both attachment_files and preview_images
                         if is_image:
-                            # Try direct upload to Notion using official API
-                            direct_notion_file = await self._upload_file_to_notion_official(
-                                file_info['temp_path'], 
-                                file_info['filename'],
-                                message_id
-                            )
-                            
                             if direct_notion_file:
                                 # Successfully uploaded directly to Notion
                                 preview_images.append(direct_notion_file)
-                                print(f"🖼️ Image uploaded directly to Notion: {file_info['filename']}")
+                                logger.info("🖼️ Image uploaded directly to Notion: %s", file_info['filename'])
                             else:
                                 # Fallback to external URL
                                 preview_image_entry = {
@@ -863,21 +1244,14 @@ class SimpleMessageListener:
                                     }
                                 }
                                 preview_images.append(preview_image_entry)
-                                print(f"🖼️ Image added to Preview Images (external URL): {file_info['filename']}")
+                                logger.info("🖼️ Image added to Preview Images (external URL): %s", file_info['filename'])
                         
                         # For non-images, try to upload to Notion as well for the regular Attached File property
                         else:
-                            # Try direct upload to Notion for non-images too
-                            direct_notion_file = await self._upload_file_to_notion_official(
-                                file_info['temp_path'], 
-                                file_info['filename'],
-                                message_id
-                            )
-                            
                             if direct_notion_file:
                                 # Use Notion-hosted file
                                 file_entry = direct_notion_file
-                                print(f"📁 File uploaded directly to Notion: {file_info['filename']}")
+                                logger.info("📁 File uploaded directly to Notion: %s", file_info['filename'])
                             # Otherwise keep the existing file_entry with external URL
                         
                         attachment_files.append(file_entry)
@@ -896,7 +1270,7 @@ class SimpleMessageListener:
                             temp_files_to_cleanup.append(file_info['temp_path'])
                     else:
                         # Fall back to just external URL if processing fails
-                        print(f"⚠️ Could not process attachment, using Discord URL only: {attachment.filename}")
+                        logger.warning("⚠️ Could not process attachment, using Discord URL only: %s", attachment.filename)
                         attachment_files.append({
                             "name": attachment.filename,
                             "external": {
@@ -904,364 +1278,98 @@ class SimpleMessageListener:
                             }
                         })
             
-            # Don't clean up temporary files yet - we need them for quickUpload later
-            # They will be cleaned up after the quickUpload attempts
+            # Every upload is done (the page is created with the resulting file objects), so spilled
+            # temp files can go now rather than after page creation and its retries
+            if temp_files_to_cleanup:
+                await self._cleanup_temp_files(temp_files_to_cleanup)
             
-            # Check for URLs in content
-            import re
-            url_pattern = r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+'
-            urls = re.findall(url_pattern, content)
-            has_url = len(urls) > 0
-            attached_url = urls[0] if urls else ""
-            
-            # Original message URL
-            message_url = f"https://discord.com/channels/{message.guild.id}/{message.channel.id}/{message.id}" if message.guild else ""
-            
-            # ISO formatted date
-            message_date = message.created_at.isoformat()
+            attached_url = record["attached_url"]
+            has_url = attached_url is not None
+            message_url = record["message_url"]
+            message_date = record["message_date"]
             
             # Check if message is a reply
             replied_message_notion_url = None
-            if message.reference and message.reference.message_id:
-                replied_message_id = str(message.reference.message_id)
+            replied_message_id = record["original_message_id"]
+            if replied_message_id:
                 replied_message_notion_url = await self._find_message_in_notion(replied_message_id)
                 
                 if replied_message_notion_url:
-                    print(f"🔗 Message is a reply to: {replied_message_id}")
+                    logger.debug("🔗 Message is a reply to: %s", replied_message_id)
                 else:
-                    print(f"⚠️  Original message not found in Notion: {replied_message_id}")
+                    logger.warning("⚠️  Original message not found in Notion: %s", replied_message_id)
             
             # Create children blocks for page content
-            page_children = []
-            
             # FIRST: Add message content in a structured format
-            page_children.extend([
-                {
-                    "object": "block",
-                    "type": "callout",
-                    "callout": {
-                        "rich_text": [
-                            {
-                                "type": "text",
-                                "text": {
-                                    "content": content if len(content) <= 2000 else content[:1997] + "..."
-                                }
-                            }
-                        ],
-                        "icon": {
-                            "emoji": "💬"
-                        },
-                        "color": "blue_background"
-                    }
+            page_children = [{
+                "object": "block",
+                "type": "callout",
+                "callout": {
+                    "rich_text": [_rich_text(notion_content)],
+                    "icon": {"emoji": "💬"},
+                    "color": "blue_background"
                 }
-            ])
+            }]
             
             # Add images if present (right after content)
-            if preview_images:
-                for img in preview_images:
-                    # Check if it's a direct upload or external URL
-                    if "file_upload" in img:
-                        # Direct Notion upload
-                        page_children.append({
-                            "object": "block",
-                            "type": "image",
-                            "image": {
-                                "type": "file_upload",
-                                "file_upload": {
-                                    "id": img["file_upload"]["id"]
-                                }
-                            }
-                        })
-                    elif "external" in img:
-                        # External URL
-                        page_children.append({
-                            "object": "block",
-                            "type": "image",
-                            "image": {
-                                "type": "external",
-                                "external": {
-                                    "url": img["external"]["url"]
-                                }
-                            }
-                        })
+            for img in preview_images:
+                # Check if it's a direct upload or external URL
+                if "file_upload" in img:
+                    # Direct Notion upload
+                    image = {"type": "file_upload", "file_upload": {"id": img["file_upload"]["id"]}}
+                elif "external" in img:
+                    # External URL
+                    image = {"type": "external", "external": {"url": img["external"]["url"]}}
+                else:
+                    continue
+                page_children.append({"object": "block", "type": "image", "image": image})
             
-            # Add divider before metadata
+            # Add divider before metadata, then the metadata table
+            page_children.append(_DIVIDER)
+            page_children.append(_DETAILS_HEADING)
             page_children.append({
                 "object": "block",
-                "type": "divider",
-                "divider": {}
-            })
-            
-            # NOW add metadata information in a more structured way
-            page_children.extend([
-                {
-                    "object": "block",
-                    "type": "heading_3",
-                    "heading_3": {
-                        "rich_text": [
-                            {
-                                "type": "text",
-                                "text": {
-                                    "content": "📧 Message Details"
-                                }
-                            }
-                        ]
-                    }
-                },
-                {
-                    "object": "block",
-                    "type": "table",
-                    "table": {
-                        "table_width": 2,
-                        "has_column_header": False,
-                        "has_row_header": False,
-                        "children": [
-                            {
-                                "object": "block",
-                                "type": "table_row",
-                                "table_row": {
-                                    "cells": [
-                                        [
-                                            {
-                                                "type": "text",
-                                                "text": {
-                                                    "content": "👤 Author"
-                                                },
-                                                "annotations": {
-                                                    "bold": True
-                                                }
-                                            }
-                                        ],
-                                        [
-                                            {
-                                                "type": "text",
-                                                "text": {
-                                                    "content": author_name
-                                                }
-                                            }
-                                        ]
-                                    ]
-                                }
-                            },
-                            {
-                                "object": "block",
-                                "type": "table_row",
-                                "table_row": {
-                                    "cells": [
-                                        [
-                                            {
-                                                "type": "text",
-                                                "text": {
-                                                    "content": "🖥️ Server"
-                                                },
-                                                "annotations": {
-                                                    "bold": True
-                                                }
-                                            }
-                                        ],
-                                        [
-                                            {
-                                                "type": "text",
-                                                "text": {
-                                                    "content": server_name
-                                                }
-                                            }
-                                        ]
-                                    ]
-                                }
-                            },
-                            {
-                                "object": "block",
-                                "type": "table_row",
-                                "table_row": {
-                                    "cells": [
-                                        [
-                                            {
-                                                "type": "text",
-                                                "text": {
-                                                    "content": "📺 Channel"
-                                                },
-                                                "annotations": {
-                                                    "bold": True
-                                                }
-                                            }
-                                        ],
-                                        [
-                                            {
-                                                "type": "text",
-                                                "text": {
-                                                    "content": f"#{channel_name}"
-                                                }
-                                            }
-                                        ]
-                                    ]
-                                }
-                            },
-                            {
-                                "object": "block",
-                                "type": "table_row",
-                                "table_row": {
-                                    "cells": [
-                                        [
-                                            {
-                                                "type": "text",
-                                                "text": {
-                                                    "content": "📅 Date"
-                                                },
-                                                "annotations": {
-                                                    "bold": True
-                                                }
-                                            }
-                                        ],
-                                        [
-                                            {
-                                                "type": "text",
-                                                "text": {
-                                                    "content": message.created_at.strftime('%Y-%m-%d %H:%M:%S UTC')
-                                                }
-                                            }
-                                        ]
-                                    ]
-                                }
-                            }
-                        ]
-                    }
+                "type": "table",
+                "table": {
+                    "table_width": 2,
+                    "has_column_header": False,
+                    "has_row_header": False,
+                    "children": [
+                        _table_row("👤 Author", author_name),
+                        _table_row("🖥️ Server", server_name),
+                        _table_row("📺 Channel", f"#{channel_name}"),
+                        _table_row("📅 Date", message.created_at.strftime('%Y-%m-%d %H:%M:%S UTC'))
+                    ]
                 }
-            ])
+            })
             
             # Add attachment information if present (and not just images)
-            non_image_attachments = [a for a in message.attachments if not any(a.filename.lower().endswith(ext) for ext in ['.jpg', '.jpeg', '.png', '.gif', '.webp', '.bmp', '.svg', '.tiff', '.tif'])]
+            non_image_attachments = [a for a in attachments if os.path.splitext(a.filename)[1].lower() not in _IMAGE_EXTENSIONS]
             if non_image_attachments:
-                page_children.extend([
-                    {
-                        "object": "block",
-                        "type": "divider",
-                        "divider": {}
-                    },
-                    {
-                        "object": "block",
-                        "type": "paragraph",
-                        "paragraph": {
-                            "rich_text": [
-                                {
-                                    "type": "text",
-                                    "text": {
-                                        "content": f"📎 Attached files ({len(non_image_attachments)}):"
-                                    },
-                                    "annotations": {
-                                        "bold": True
-                                    }
-                                }
-                            ]
-                        }
-                    }
-                ])
+                page_children.append(_DIVIDER)
+                page_children.append(_text_block("paragraph", f"📎 Attached files ({len(non_image_attachments)}):", bold=True))
                 
                 # Add each non-image attachment as a bullet point
                 for attachment in non_image_attachments:
-                    page_children.append({
-                        "object": "block",
-                        "type": "bulleted_list_item",
-                        "bulleted_list_item": {
-                            "rich_text": [
-                                {
-                                    "type": "text",
-                                    "text": {
-                                        "content": f"📄 {attachment.filename} ({attachment.size} bytes)"
-                                    }
-                                }
-                            ]
-                        }
-                    })
+                    page_children.append(_text_block("bulleted_list_item", f"📄 {attachment.filename} ({attachment.size} bytes)"))
             
             # Add URL information if present
             if has_url:
-                page_children.extend([
-                    {
-                        "object": "block",
-                        "type": "divider",
-                        "divider": {}
-                    },
-                    {
-                        "object": "block",
-                        "type": "paragraph",
-                        "paragraph": {
-                            "rich_text": [
-                                {
-                                    "type": "text",
-                                    "text": {
-                                        "content": "🔗 URL found in the message:"
-                                    },
-                                    "annotations": {
-                                        "bold": True
-                                    }
-                                }
-                            ]
-                        }
-                    },
-                    {
-                        "object": "block",
-                        "type": "paragraph",
-                        "paragraph": {
-                            "rich_text": [
-                                {
-                                    "type": "text",
-                                    "text": {
-                                        "content": attached_url
-                                    },
-                                    "href": attached_url
-                                }
-                            ]
-                        }
-                    }
-                ])
+                page_children.append(_DIVIDER)
+                page_children.append(_text_block("paragraph", "🔗 URL found in the message:", bold=True))
+                page_children.append(_text_block("paragraph", attached_url, href=attached_url))
             
             # Add reply information if present
             if replied_message_notion_url:
-                page_children.extend([
-                    {
-                        "object": "block",
-                        "type": "divider",
-                        "divider": {}
-                    },
-                    {
-                        "object": "block",
-                        "type": "paragraph",
-                        "paragraph": {
-                            "rich_text": [
-                                {
-                                    "type": "text",
-                                    "text": {
-                                        "content": "💬 This message is a reply to:"
-                                    },
-                                    "annotations": {
-                                        "bold": True
-                                    }
-                                }
-                            ]
-                        }
-                    },
-                    {
-                        "object": "block",
-                        "type": "paragraph",
-                        "paragraph": {
-                            "rich_text": [
-                                {
-                                    "type": "text",
-                                    "text": {
-                                        "content": "View original message"
-                                    },
-                                    "href": replied_message_notion_url
-                                }
-                            ]
-                        }
-                    }
-                ])
+                page_children.append(_DIVIDER)
+                page_children.append(_text_block("paragraph", "💬 This message is a reply to:", bold=True))
+                page_children.append(_text_block("paragraph", "View original message", href=replied_message_notion_url))
 
-            # Create Notion page object
+            # Create Notion page object from the per-channel template
             notion_page = {
-                "parent": {"database_id": self.notion_database_id},
+                "parent": template["parent"],
                 "properties": {
+                    **template["properties"],
                     "Message ID": {
                         "rich_text": [
                             {
@@ -1285,40 +1393,29 @@ class SimpleMessageListener:
                             "start": message_date
                         }
                     },
-                    "Server": {
-                        "select": {
-                            "name": server_name
-                        }
-                    },
-                    "Channel": {
-                        "select": {
-                            "name": channel_name
-                        }
-                    },
-                    "Category": {
-                        "select": {
-                            "name": category_name
-                        }
-                    },
                     "Content": {
                         "rich_text": [
                             {
                                 "text": {
-                                    "content": content[:2000]  # Notion character limit
+                                    "content": notion_content  # Notion character limit
                                 }
                             }
                         ]
-                    },
-                    "Attached URL": {
-                        "url": attached_url if has_url else None
-                    },
-                    "Message URL": {
-                        "url": message_url if message_url else None
                     }
                 },
                 "children": page_children
             }
             
+            if has_url:
+                notion_page["properties"]["Attached URL"] = {
+                    "url": attached_url
+                }
+            
+            if message_url:
+                notion_page["properties"]["Message URL"] = {
+                    "url": message_url
+                }
+            
             # Add attachments if present
             if attachment_files:
                 notion_page["properties"]["Attached File"] = {
@@ -1330,7 +1427,7 @@ class SimpleMessageListener:
                 notion_page["properties"]["Preview Images"] = {
                     "files": preview_images
                 }
-                print(f"🖼️ Added {len(preview_images)} images to Preview Images property")
+                logger.debug("🖼️ Added %d images to Preview Images property", len(preview_images))
             
             # Add original message URL if reply
             if replied_message_notion_url:
@@ -1343,388 +1440,396 @@ class SimpleMessageListener:
             response = None
             for attempt in range(1, max_notion_retries + 1):
                 try:
-                    response = await asyncio.to_thread(
-                        self.notion_client.pages.create,
-                        **notion_page
-                    )
+                    response = await self._notion_request('POST', 'pages', notion_page)
                     break  # Success
                 except Exception as notion_error:
                     if await self._handle_rate_limit_error(notion_error, attempt):
                         if attempt < max_notion_retries:
-                            print(f"🔄 Retrying Notion save (attempt {attempt + 1}/{max_notion_retries})")
+                            logger.warning("🔄 Retrying Notion save (attempt %d/%d)", attempt + 1, max_notion_retries)
                             continue
                         else:
-                            print(f"❌ Max Notion retries reached for message {message_id}")
+                            logger.error("❌ Max Notion retries reached for message %s", message_id)
                             return None
                     else:
                         # Not a rate limit error, re-raise
                         raise notion_error
             
-            # If we successfully created the page and have temp files, upload them using quickUpload
-            if response and temp_files_to_cleanup:
-                page_id = response['id']  # type: ignore
-                print(f"📄 Page created successfully, now uploading files using quickUpload...")
-                
-                # Upload files to the created page using quickUpload
-                uploaded_files_via_quick = []
-                for temp_path in temp_files_to_cleanup:
-                    # Find the corresponding filename
-                    filename = os.path.basename(temp_path)
-                    
-                    # Try to upload using quickUpload
-                    quick_upload_result = await self._upload_file_to_existing_page(temp_path, filename, page_id)
-                    
-                    if quick_upload_result:
-                        uploaded_files_via_quick.append(quick_upload_result)
-                        print(f"✅ File {filename} uploaded via quickUpload")
-                    else:
-                        print(f"⚠️ quickUpload failed for {filename}, file was already included via external URL")
-                
-                # If we have successfully uploaded files via quickUpload, update the page
-                if uploaded_files_via_quick:
-                    try:
-                        # Get existing properties
-                        existing_attached_files = notion_page["properties"].get("Attached File", {}).get("files", [])
-                        existing_preview_images = notion_page["properties"].get("Preview Images", {}).get("files", [])
-                        
-                        # Add quickUpload files to existing ones
-                        all_attached_files = existing_attached_files + uploaded_files_via_quick
-                        
-                        # Update the page with quickUpload files
-                        update_properties = {
-                            "Attached File": {
-                                "files": all_attached_files
-                            }
-                        }
-                        
-                        # Note: No need to add to Preview Images again as they were already added during initial processing
-                        
-                        # Update the page with new file properties
-                        await asyncio.to_thread(
-                            self.notion_client.pages.update,
-                            page_id=page_id,
-                            properties=update_properties
-                        )
-                        
-                        print(f"✅ Page updated with {len(uploaded_files_via_quick)} files via quickUpload")
-                        
-                    except Exception as update_error:
-                        print(f"⚠️ Failed to update page with quickUpload files: {update_error}")
-                
-                # Clean up temporary files after quickUpload attempts
-                if temp_files_to_cleanup:
-                    await self._cleanup_temp_files(temp_files_to_cleanup)
-            else:
-                # Clean up temp files even if page creation failed or no temp files for quickUpload
-                if temp_files_to_cleanup:
-                    await self._cleanup_temp_files(temp_files_to_cleanup)
+            # Remember the new page so replies to this message resolve without a query
+            if response:
+                self._cache_notion_url(message_id, self._notion_page_url(response['id']))
             
             reply_info = " (reply)" if replied_message_notion_url else ""
-            print(f"✅ Message saved in Notion: {author_name} in #{channel_name}{reply_info}")
+            logger.info("✅ Message saved in Notion: %s in #%s%s", author_name, channel_name, reply_info)
             return response
             
         except Exception as e:
-            print(f"❌ Error saving message in Notion: {e}")
+            logger.error("❌ Error saving message in Notion: %s", e)
             return None
         
+    def _start_notion_worker(self):
+        """Create the Notion queue and start its worker pool (once per process)"""
+        if any(not task.done() for task in self._notion_worker_tasks):
+            return
+        
+        self._notion_queue = asyncio.Queue(maxsize=self._notion_queue_size)
+        self._notion_worker_tasks = [
+            asyncio.create_task(self._notion_worker(self._notion_queue))
+            for _ in range(self._notion_worker_count)
+        ]
+        logger.info("📤 Notion writers started (workers: %s)", self._notion_worker_count)
+
+    async def _notion_worker(self, queue: asyncio.Queue):
+        """Write queued messages one at a time; the pool runs several of these concurrently"""
+        while True:
+            message, record = await queue.get()
+            try:
+                await self._write_message(message, record)
+            finally:
+                queue.task_done()
+
     async def _log_message(self, message: discord.Message):
-        """Log message in Notion and as backup in text file"""
+        """Always append the message to the backup file, then queue it for Notion"""
+        # The buffered JSONL write is cheap, so every message gets a local copy even if Notion
+        # later fails for good; Notion itself is written in the background by the worker pool
+        record = self._extract_message_record(message)
+        await self._log_message_to_file(message, record)
+        
+        if self._notion_queue is not None:
+            try:
+                self._notion_queue.put_nowait((message, record))
+            except asyncio.QueueFull:
+                logger.warning("⚠️ Notion queue full, message %s kept in backup file only", message.id)
+
+    async def _jsonl_writer(self):
+        """Write queued JSONL lines in batches, one thread hop per batch"""
+        queue = self._jsonl_queue
+        batch: List[bytes] = []
         try:
-            # Try saving to Notion first
-            notion_success = False
-            if self.notion_client:
-                notion_response = await self._save_message_to_notion(message)
-                notion_success = bool(notion_response)
-            
-            # If Notion fails or is not configured, use text file as backup
-            if not notion_success:
-                await self._log_message_to_file(message)
+            while True:
+                # Whatever piled up while the previous write ran goes out together
+                batch.append(await queue.get())
+                while len(batch) < self._jsonl_batch_size and not queue.empty():
+                    batch.append(queue.get_nowait())
                 
-        except Exception as e:
-            print(f"❌ Error logging message: {e}")
-            # As last resort, try saving to file
+                data, batch = b''.join(batch), []
+                await asyncio.to_thread(self._jsonl_fp.write, data)
+        except asyncio.CancelledError:
+            # Shutting down: write anything still queued before the file is closed
+            while not queue.empty():
+                batch.append(queue.get_nowait())
+            if batch:
+                self._jsonl_fp.write(b''.join(batch))
+            raise
+
+    async def _flush_log_periodically(self):
+        """Flush the buffered backup logs to disk every few seconds"""
+        while not self._log_fp.closed:
+            await asyncio.sleep(self._log_flush_interval)
             try:
-                await self._log_message_to_file(message)
-            except:
-                print(f"❌ Critical error: Could not save message by any method")
+                await asyncio.to_thread(self._jsonl_fp.flush)
+                await asyncio.to_thread(self._log_fp.flush)
+            except (OSError, ValueError) as e:
+                logger.warning("⚠️ Could not flush log file: %s", e)
+
+    async def _write_message(self, message: discord.Message, record: Optional[dict] = None):
+        """Save a queued message to Notion (the backup file already has it)"""
+        try:
+            if not await self._save_message_to_notion(message, record):
+                logger.warning("⚠️ Message %s not saved to Notion, kept in backup file only", message.id)
+        except Exception as e:
+            logger.error("❌ Error saving message %s to Notion: %s", message.id, e)
     
-    async def _log_message_to_file(self, message: discord.Message):
+    async def _log_message_to_file(self, message: discord.Message, record: Optional[dict] = None):
         """Log message to JSON file (backup method) - Asynchronous version"""
         try:
-            import json
-            
-            # Get message info
-            server_name = message.guild.name if message.guild else 'DM'
-            
-            try:
-                channel_name = getattr(message.channel, 'name', 'DM')
-            except:
-                channel_name = 'DM'
-            
-            # Get channel category (if exists)
-            category_name = None
-            try:
-                if hasattr(message.channel, 'category') and message.channel.category:
-                    category_name = message.channel.category.name
-                else:
-                    category_name = "Sin categoría"
-            except:
-                category_name = "Sin categoría"
-            
-            # Get author name
-            author_name = f"@{message.author.name}"
-            
-            content = message.content or '[No text content]'
-            
-            # Discord message ID
-            message_id = str(message.id)
-            
-            # Check for URLs in content
-            import re
-            url_pattern = r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+'
-            urls = re.findall(url_pattern, content)
-            has_url = len(urls) > 0
-            attached_url = urls[0] if urls else None
-            
-            # Original message URL
-            message_url = f"https://discord.com/channels/{message.guild.id}/{message.channel.id}/{message.id}" if message.guild else None
-            
-            # ISO formatted date
-            message_date = message.created_at.isoformat()
+            if record is None:
+                record = self._extract_message_record(message)
+            server_name = record["server_name"]
+            channel_name = record["channel_name"]
+            category_name = record["category_name"]
+            author_name = record["author_name"]
+            content = record["content"]
+            message_date = record["message_date"]
             
             # Process attachments
-            attached_files = []
-            preview_images_info = []  # For backup logging
-            if message.attachments:
-                for attachment in message.attachments:
-                    # Check if it's an image
-                    _, ext = os.path.splitext(attachment.filename)
-                    image_extensions = {'.jpg', '.jpeg', '.png', '.gif', '.webp', '.bmp', '.svg', '.tiff', '.tif'}
-                    is_image = ext.lower() in image_extensions
-                    
-                    attachment_info = {
-                        "name": attachment.filename,
-                        "url": attachment.url,
-                        "size": attachment.size,
-                        "width": getattr(attachment, 'width', None),
-                        "height": getattr(attachment, 'height', None),
-                        "is_image": is_image,
-                        "extension": ext.lower()
-                    }
-                    
-                    attached_files.append(attachment_info)
-                    
-                    # If it's an image, also add to preview images
-                    if is_image:
-                        preview_images_info.append({
-                            "filename": attachment.filename,
-                            "url": attachment.url,
-                            "width": getattr(attachment, 'width', None),
-                            "height": getattr(attachment, 'height', None)
-                        })
+            attached_files = [
+                {
+                    "name": attachment.filename,
+                    "url": attachment.url,
+                    "size": attachment.size,
+                    "width": getattr(attachment, 'width', None),
+                    "height": getattr(attachment, 'height', None),
+                    "is_image": ext in _IMAGE_EXTENSIONS,
+                    "extension": ext
+                }
+                for attachment in message.attachments
+                for ext in (os.path.splitext(attachment.filename)[1].lower(),)
+            ]
             
-            # Check if message is a reply
-            original_message_id = None
-            if message.reference and message.reference.message_id:
-                original_message_id = str(message.reference.message_id)
+            # Images are also listed as preview images (for backup logging)
+            preview_images_info = [
+                {
+                    "filename": info["name"],
+                    "url": info["url"],
+                    "width": info["width"],
+                    "height": info["height"]
+                }
+                for info in attached_files if info["is_image"]
+            ]
             
             # Create JSON structure matching Notion fields
             message_data = {
-                "timestamp": datetime.datetime.now().isoformat(),
-                "message_id": message_id,
+                "message_id": record["message_id"],
                 "author": author_name,
                 "date": message_date,
                 "server": server_name,
                 "channel": channel_name,
                 "category": category_name,
                 "content": content,
-                "attached_url": attached_url,
-                "message_url": message_url,
+                "attached_url": record["attached_url"],
+                "message_url": record["message_url"],
                 "attached_files": attached_files if attached_files else None,
                 "preview_images": preview_images_info if preview_images_info else None,
-                "original_message_id": original_message_id,
+                "original_message_id": record["original_message_id"],
                 "has_embeds": len(message.embeds) > 0,
                 "embed_count": len(message.embeds) if message.embeds else 0,
                 "image_count": len(preview_images_info) if preview_images_info else 0
             }
             
-            # Change log file extension to .json
-            json_log_file = self.log_file.replace('.txt', '.json')
+            # One JSON object per line; the writer task batches lines into the 512 KiB file buffer
+            self._jsonl_queue.put_nowait(orjson.dumps(message_data) + b'\n')
             
-            # Define async function for file operations
-            def _read_write_json_file():
-                # Read existing data or create new list
-                try:
-                    with open(json_log_file, 'r', encoding='utf-8') as f:
-                        existing_data = json.load(f)
-                        if not isinstance(existing_data, list):
-                            existing_data = []
-                except (FileNotFoundError, json.JSONDecodeError):
-                    existing_data = []
-                
-                # Append new message
-                existing_data.append(message_data)
-                
-                # Write back to file
-                with open(json_log_file, 'w', encoding='utf-8') as f:
-                    json.dump(existing_data, f, indent=2, ensure_ascii=False)
-                
-                return True
-            
-            # Execute file operations in a separate thread
-            await asyncio.to_thread(_read_write_json_file)
-            
-            # Show in console with category and image info
-            category_info = f" 📂{category_name}" if category_name and category_name != "Sin categoría" else ""
-            image_info = f" [🖼️{len(preview_images_info)} images]" if preview_images_info else ""
-            print(f"📝 [BACKUP JSON] [{server_name}]{category_info} #{channel_name} | {author_name}: {content[:50]}{'...' if len(content) > 50 else ''}{image_info}")
+            # Show in console with category and image info (every message is teed here, so DEBUG only)
+            if logger.isEnabledFor(logging.DEBUG):
+                category_info = f" 📂{category_name}" if category_name and category_name != "Sin categoría" else ""
+                image_info = f" [🖼️{len(preview_images_info)} images]" if preview_images_info else ""
+                console_content = content if len(content) <= 50 else content[:50] + '...'
+                logger.debug("📝 [BACKUP JSON] [%s]%s #%s | %s: %s%s", server_name, category_info, channel_name, author_name, console_content, image_info)
             
         except Exception as e:
-            print(f"❌ Error logging message to JSON file: {e}")
+            logger.error("❌ Error logging message to JSON file: %s", e)
             # Fallback to old text format if JSON fails
             try:
-                timestamp = datetime.datetime.now().isoformat()
+                timestamp = message.created_at.isoformat()
                 log_entry = f"[{timestamp}] ERROR LOGGING JSON - {server_name} > #{channel_name} | {author_name}: {content}\n"
                 
-                # Async fallback write operation
-                def _write_fallback():
-                    with open(self.log_file, 'a', encoding='utf-8') as f:
-                        f.write(log_entry)
-                
-                await asyncio.to_thread(_write_fallback)
+                # Buffered write; the periodic flush task moves it to disk
+                self._log_fp.write(log_entry)
             except:
-                print(f"❌ Critical error: Could not save message by any method")
+                logger.critical("❌ Critical error: Could not save message by any method")
     
-    def validate_config(self) -> bool:
-        """Validate bot configuration"""
-        if not self.token:
-            print("❌ Discord token not found. Set DISCORD_TOKEN in the .env file")
-            return False
-        
-        if not self.target_server_id:
-            print("❌ Server ID not configured. Set MONITORING_SERVER_ID in the .env file")
-            return False
-        
-        # Notion configuration validation (opcional but recommended)
+    def _log_config_notes(self):
+        """Log which optional integrations are active (Config has already rejected invalid settings)"""
         if not self.notion_token or not self.notion_database_id:
-            print("⚠️  Notion configuration not found. Messages will be saved only to text file.")
-            print("   To use Notion, set NOTION_TOKEN and NOTION_DATABASE_ID in the .env file")
+            logger.warning("⚠️  Notion configuration not found. Messages will be saved only to text file.")
+            logger.warning("   To use Notion, set NOTION_TOKEN and NOTION_DATABASE_ID in the .env file")
         else:
-            print("✅ Notion configuration found. Messages will be saved in Notion.")
-            print("   🖼️ Files will be uploaded directly to Notion via official 3-step upload API")
-            print("   📁 All files appear in both 'Attached File' and 'Preview Images' (for images) properties")
-            print("   🔄 Uses official endpoints: /files/upload, signed URL, /files/upload/{id}/complete")
+            logger.info("✅ Notion configuration found. Messages will be saved in Notion.")
+            logger.info("   🖼️ Files will be uploaded directly to Notion via official 3-step upload API")
+            logger.info("   📁 All files appear in both 'Attached File' and 'Preview Images' (for images) properties")
+            logger.info("   🔄 Uses official endpoints: /files/upload, signed URL, /files/upload/{id}/complete")
         
-        # Heartbeat configuration validation
+        # Heartbeat configuration
         if not self.heartbeat_url:
-            print("⚠️  Heartbeat URL not configured. Set HEALTHCHECKS_PING_URL in the .env file")
+            logger.warning("⚠️  Heartbeat URL not configured. Set HEALTHCHECKS_PING_URL in the .env file")
         else:
-            print(f"✅ Heartbeat system configured: {self.heartbeat_url[:50]}...")
+            logger.info("✅ Heartbeat system configured: %s...", self.heartbeat_url[:50])
         
-        # 🔥 ACTUALIZADO: Google Drive configuration validation
+        # Google Drive configuration
         if self.google_drive_enabled:
-            if self.google_drive_service_account and os.path.exists(self.google_drive_service_account):
-                print("✅ Google Drive enabled with Service Account (recommended)")
-                print(f"📁 Service Account file: {self.google_drive_service_account}")
+            if self.config.drive_uses_service_account:
+                logger.info("✅ Google Drive enabled with Service Account (recommended)")
+                logger.info("📁 Service Account file: %s", self.google_drive_service_account)
                 if self.google_drive_folder_id:
-                    print(f"📁 Target folder ID: {self.google_drive_folder_id}")
+                    logger.info("📁 Target folder ID: %s", self.google_drive_folder_id)
                 else:
-                    print("📁 Will create 'Discord Attachments' folder")
-            elif os.path.exists(self.google_drive_credentials):
-                print("✅ Google Drive enabled with OAuth2 credentials (legacy)")
-                print("⚠️  Consider migrating to Service Account for server environments")
-                print(f"📁 OAuth2 credentials: {self.google_drive_credentials}")
+                    logger.info("📁 Will create 'Discord Attachments' folder")
+            else:
+                logger.info("✅ Google Drive enabled with OAuth2 credentials (legacy)")
+                logger.warning("⚠️  Consider migrating to Service Account for server environments")
+                logger.info("📁 OAuth2 credentials: %s", self.google_drive_credentials)
                 if self.google_drive_folder_id:
-                    print(f"📁 Target folder ID: {self.google_drive_folder_id}")
+                    logger.info("📁 Target folder ID: %s", self.google_drive_folder_id)
                 else:
-                    print("📁 Will create 'Discord Attachments' folder in personal drive")
-            else:
-                print("❌ Google Drive enabled but no valid credentials found")
-                print("   For Service Account: Set GOOGLE_SERVICE_ACCOUNT_FILE=service_account.json")
-                print("   For OAuth2 (legacy): Download credentials.json from Google Cloud Console")
-                print("   Set GOOGLE_DRIVE_ENABLED=false to disable Google Drive")
-                return False
+                    logger.info("📁 Will create 'Discord Attachments' folder in personal drive")
         else:
-            print("⚠️  Google Drive disabled. Files will use Discord URLs only.")
-            print("   Set GOOGLE_DRIVE_ENABLED=true to enable Google Drive uploads")
-        
-        return True
+            logger.warning("⚠️  Google Drive disabled. Files will use Discord URLs only.")
+            logger.warning("   Set GOOGLE_DRIVE_ENABLED=true to enable Google Drive uploads")
     
     async def show_runtime_stats(self):
         """Show runtime statistics"""
         if not self.is_monitoring:
-            print("📊 Bot is not monitoring yet")
+            logger.info("📊 Bot is not monitoring yet")
             return
             
-        print("📊 Runtime Statistics:")
-        print(f"   - Messages processed: {self.processed_messages}")
-        print(f"   - Failed messages: {self.failed_messages}")
-        print(f"   - Success rate: {((self.processed_messages / (self.processed_messages + self.failed_messages)) * 100):.1f}%" if (self.processed_messages + self.failed_messages) > 0 else "N/A")
-        print(f"   - Monitoring status: {'🟢 Active' if self.is_monitoring else '🔴 Inactive'}")
+        logger.info("📊 Runtime Statistics:")
+        logger.info("   - Messages processed: %s", self.processed_messages)
+        logger.info("   - Failed messages: %s", self.failed_messages)
+        total = self.processed_messages + self.failed_messages
+        logger.info("   - Success rate: %s", f"{self.processed_messages / total * 100:.1f}%" if total else "N/A")
+        logger.info("   - Monitoring status: %s", '🟢 Active' if self.is_monitoring else '🔴 Inactive')
         
         if self.heartbeat_system:
             heartbeat_status = await self.get_heartbeat_status()
-            print(f"   - Heartbeat: {heartbeat_status.get('status', 'Unknown')}")
+            logger.info("   - Heartbeat: %s", heartbeat_status.get('status', 'Unknown'))
+
+    async def __aenter__(self):
+        """Log in on the running loop; everything from here on is torn down by __aexit__"""
+        asyncio.get_running_loop().set_default_executor(self._io_executor)
+        try:
+            if self.heartbeat_system:
+                # Warm DNS/TLS to the heartbeat host while logging in, so the start ping is a warm request
+                await asyncio.gather(self.client.login(self.token), self.heartbeat_system.preconnect())
+            else:
+                await self.client.login(self.token)
+        except BaseException as error:
+            # __aexit__ never runs when __aenter__ fails (e.g. bad or expired token):
+            # report the failure to the heartbeat and close the sessions here, then re-raise
+            await self.__aexit__(type(error), error, error.__traceback__)
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        """Shut down on the same loop, whether the client stopped, crashed or was interrupted"""
+        failed = exc_type is not None and issubclass(exc_type, Exception)
+        try:
+            await self.graceful_shutdown(error=exc if failed else None)
+        except Exception as shutdown_error:
+            logger.warning("⚠️ Error during shutdown: %s", shutdown_error)
+        return False
+
+    async def _amain(self):
+        """Run the client inside the listener's context so teardown always happens"""
+        loop = asyncio.get_running_loop()
+        main_task = asyncio.current_task()
+        stop_signal = None
+        
+        def _on_stop_signal(sig: signal.Signals):
+            # Cancel once; a repeated Ctrl-C must not interrupt the shutdown already under way
+            nonlocal stop_signal
+            if stop_signal is not None:
+                logger.warning("⚠️ %s received again, shutdown already in progress", sig.name)
+                return
+            stop_signal = sig
+            logger.info("📡 %s received, shutting down...", sig.name)
+            main_task.cancel()
+        
+        # SIGTERM (systemd stop) gets the same clean teardown as Ctrl-C
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, _on_stop_signal, sig)
+            except (NotImplementedError, RuntimeError):
+                pass  # Not supported on this platform/thread; KeyboardInterrupt still applies
+        
+        try:
+            async with self:
+                await self.client.connect()
+        except asyncio.CancelledError:
+            if stop_signal is None:
+                raise
 
-    async def graceful_shutdown(self):
-        """Gracefully shutdown the bot"""
-        print("\n🛑 Initiating graceful shutdown...")
+    async def graceful_shutdown(self, error: Optional[BaseException] = None):
+        """Gracefully shutdown the bot (error is reported to the heartbeat as a failure)"""
+        logger.info("🛑 Initiating graceful shutdown...")
         self.is_monitoring = False
         
-        # Send final heartbeat
-        if self.heartbeat_system:
+        try:
+            # Final heartbeat pings and the Discord close / Notion drain are independent I/O:
+            # run them side by side so shutdown takes the longer of the two, not their sum.
+            # gather (not a TaskGroup) so one failing step never cancels the other
+            steps = [self._close_and_drain()]
+            if self.heartbeat_system:
+                steps.append(self._send_final_heartbeat(error))
+            for result in await asyncio.gather(*steps, return_exceptions=True):
+                if isinstance(result, Exception):
+                    logger.error("❌ Error during shutdown: %s", result)
+            
+            # Show final stats
+            await self.show_runtime_stats()
+        finally:
+            # Release pooled connections, even if a step above failed
+            if self._notion_http and not self._notion_http.closed:
+                await self._notion_http.close()
+            if self.http_session and not self.http_session.closed:
+                await self.http_session.close()
+            
+        logger.info("✅ Bot shutdown completed")
+
+    async def _send_final_heartbeat(self, error: Optional[BaseException] = None):
+        """Report the shutdown outcome to the heartbeat endpoint, then stop the heartbeat loop"""
+        # Pings still queued from message handling go out before the final one
+        await self.heartbeat_system.flush_pings()
+        if error is None:
             await self.heartbeat_system.send_ping("success", f"Bot shutting down. Total processed: {self.processed_messages}")
-            await self.heartbeat_system.stop_heartbeat()
+        else:
+            await self.heartbeat_system.send_ping("fail", f"Critical error: {error!s:.100}")
+        await self.heartbeat_system.stop_heartbeat()
+    
+    async def _close_and_drain(self):
+        """Close the Discord connection, then let queued Notion writes finish"""
+        if not self.client.is_closed():
+            try:
+                await self.client.close()
+            except Exception as e:
+                # Still drain: queued writes matter more than a clean Discord close
+                logger.error("❌ Error closing Discord connection: %s", e)
         
-        # Show final stats
-        await self.show_runtime_stats()
+        # Queued writes must finish before their sessions are closed
+        if self._notion_queue is not None:
+            logger.info("⏳ Waiting for pending Notion writes (%s queued)...", self._notion_queue.qsize())
+            try:
+                await asyncio.wait_for(self._notion_queue.join(), timeout=self._notion_drain_timeout)
+            except asyncio.TimeoutError:
+                logger.warning("⚠️ %s Notion writes not finished (messages are in the backup file)", self._notion_queue.qsize())
         
-        # Close Discord connection
-        if not self.client.is_closed():
-            await self.client.close()
-            
-        print("✅ Bot shutdown completed")
+        # Keep this run's lookups for the next start
+        try:
+            await asyncio.to_thread(self._save_notion_url_cache)
+        except Exception as e:
+            logger.warning("⚠️ Could not save Notion lookup cache snapshot: %s", e)
+
+    def _build_startup_banner(self) -> str:
+        """Configuration summary printed at startup (status labels are precomputed in __init__)"""
+        return "\n".join((
+            "🚀 Starting Discord Message Listener...",
+            "📋 Configuration:",
+            "   - Mode: 🔴 Real-time monitoring (NEW MESSAGES ONLY)",
+            "   - Self-monitoring: ✅ ENABLED (will monitor own messages)",
+            "   - Server: " + self.target_server_id,
+            "   - Channels: " + self._channels_status,
+            "   - Notion: " + self._notion_status,
+            "   - Google Drive: " + self._drive_status,
+            "   - Heartbeats: " + self._heartbeat_status,
+            "   - Backup file: " + self.jsonl_log_file,
+            "-" * 60,
+        ))
 
     def run(self):
         """Start the bot"""
-        if not self.validate_config():
-            return
+        setup_logging(self.log_level)
+        self._log_config_notes()
+        
+        # Startup banner, built once and emitted as a single record (skipped when INFO is disabled)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("%s", self._startup_banner)
         
-        print("🚀 Starting Discord Message Listener...")
-        print("📋 Configuration:")
-        print(f"   - Mode: 🔴 Real-time monitoring (NEW MESSAGES ONLY)")
-        print(f"   - Self-monitoring: ✅ ENABLED (will monitor own messages)")
-        print(f"   - Server: {self.target_server_id}")
-        print(f"   - Channels: {'Specific' if self.target_channel_ids else 'All'}")
-        print(f"   - Notion: {'✅ Configured (Official 3-Step Upload API + Smart Rate Limiting)' if self.notion_client else '❌ Not configured'}")
-        print(f"   - Google Drive: {'✅ Enabled' if self.google_drive_enabled else '❌ Disabled'}")
-        print(f"   - Heartbeats: {'✅ Configured' if self.heartbeat_system else '❌ Not configured'}")
-        print(f"   - Backup file: {self.log_file}")
-        print("-" * 60)
+        # root=False: only the discord logger gets a handler, so our own loggers don't print twice
+        discord.utils.setup_logging(root=False)
         
+        # One loop for the whole lifetime: login, monitoring, failure ping and shutdown all run
+        # inside _amain's context manager; the runner then cancels leftover background tasks
         try:
-            if self.token:
-                self.client.run(self.token)
-            else:
-                print("❌ Invalid token")
+            (uvloop.run if uvloop else asyncio.run)(self._amain())
         except KeyboardInterrupt:
-            print("\n⏹️ Keyboard interrupt received...")
-            # Run graceful shutdown
-            try:
-                asyncio.run(self.graceful_shutdown())
-            except Exception as shutdown_error:
-                print(f"⚠️ Error during shutdown: {shutdown_error}")
+            logger.info("⏹️ Keyboard interrupt received, shutdown completed")
         except Exception as error:
-            print(f"❌ Error starting bot: {error}")
+            logger.error("❌ Error starting bot: %s", error)
             if "Improper token" in str(error):
-                print("🔑 Make sure to use a valid Discord token")
-            
-            # Send critical error ping
-            if self.heartbeat_system:
-                try:
-                    asyncio.run(self.heartbeat_system.send_ping("fail", f"Critical error: {str(error)[:100]}"))
-                except:
-                    pass  # Don't fail on heartbeat error during shutdown
+                logger.error("🔑 Make sure to use a valid Discord token")
+        finally:
+            self._io_executor.shutdown(wait=False)
+            self._jsonl_fp.close()
+            self._log_fp.close()
     
     async def get_heartbeat_status(self) -> dict:
         """Get heartbeat system status"""
@@ -1742,8 +1847,14 @@ class SimpleMessageListener:
 
 def main():
     """Main entry point"""
-    listener = SimpleMessageListener()
-    listener.run()
+    try:
+        config = Config.from_env()
+    except ConfigError as error:
+        setup_logging()
+        logger.error("%s", error)
+        sys.exit(1)
+    
+    SimpleMessageListener(config).run()
 
 if __name__ == "__main__":
     main()
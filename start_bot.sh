@@ -42,6 +42,10 @@ echo "📝 El bot procesará NUEVOS MENSAJES que lleguen a partir de ahora"
 echo "💡 Para detener el bot, presiona Ctrl+C"
 echo ""
 
-# Ejecutar el bot
+# Precompilar a bytecode optimizado (-o 2 coincide con -OO, así el arranque no recompila);
+# -l: solo los módulos del bot, sin recorrer el entorno virtual discord_selfbotting/
+python3 -m compileall -q -l -o 2 .
+
+# Ejecutar el bot (-OO: sin asserts ni docstrings en memoria)
 echo "🎧 Iniciando bot..."
-python3 simple_message_listener.py
+python3 -OO simple_message_listener.py
@@ -0,0 +1,89 @@
+import dataclasses
+
+import pytest
+
+from simple_message_listener import Config, ConfigError, _parse_channel_ids
+
+# Token ficticio con formato válido (ID de usuario . timestamp . HMAC)
+FAKE_DISCORD_TOKEN = "MTAwMDAwMDAwMDAwMDAwMDAw.GFakeT.ZmFrZV90b2tlbl9mb3JfdGVzdHNfb25seQ"
+
+# Variables que lee Config.from_env; se limpian para que un .env local no altere los tests
+CONFIG_ENV_VARS = (
+    "DISCORD_TOKEN", "MONITORING_SERVER_ID", "MONITORING_CHANNEL_IDS", "LOG_LEVEL",
+    "IO_THREADS", "NOTION_THREADS", "NOTION_WORKERS", "NOTION_MAX_CONCURRENCY",
+    "NOTION_RATE_LIMIT", "NOTION_URL_CACHE_SIZE", "HEARTBEAT_INTERVAL", "GOOGLE_DRIVE_ENABLED",
+)
+
+# --- Fixtures de Pytest (Configuración reutilizable) ---
+
+@pytest.fixture
+def env(monkeypatch):
+    """Entorno mínimo válido para Config.from_env."""
+    for name in CONFIG_ENV_VARS:
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("DISCORD_TOKEN", FAKE_DISCORD_TOKEN)
+    monkeypatch.setenv("MONITORING_SERVER_ID", "123456789")
+    return monkeypatch
+
+@pytest.fixture
+def config(env):
+    """Config válida construida desde el entorno mínimo."""
+    return Config.from_env()
+
+# --- Tests ---
+
+## 1. Entorno mínimo
+def test_from_env_defaults(config):
+    assert config.token == FAKE_DISCORD_TOKEN
+    assert config.target_channel_ids == frozenset()
+    assert config.log_level == "INFO"
+    assert config.notion_workers == 8
+    assert config.notion_rate_limit == 3.0
+
+## 2. Token de Discord
+@pytest.mark.parametrize("token", ["", "fake_token", FAKE_DISCORD_TOKEN + " extra"])
+def test_malformed_token_rejected(config, token):
+    with pytest.raises(ConfigError):
+        dataclasses.replace(config, token=token)
+
+def test_legacy_mfa_token_accepted(config):
+    assert dataclasses.replace(config, token="mfa." + "a" * 40).token.startswith("mfa.")
+
+## 3. ID del servidor
+@pytest.mark.parametrize("server_id", [None, "", "my-server"])
+def test_invalid_server_id_rejected(config, server_id):
+    with pytest.raises(ConfigError):
+        dataclasses.replace(config, target_server_id=server_id)
+
+## 4. IDs de canales
+def test_parse_channel_ids_skips_blanks_and_comments():
+    assert _parse_channel_ids(" 111, 222 ,, # canales de prueba") == frozenset({111, 222})
+
+def test_parse_channel_ids_rejects_non_numeric():
+    # Un conjunto vacío significa "todos los canales": un error no puede ampliar el alcance
+    with pytest.raises(ConfigError):
+        _parse_channel_ids("general")
+
+## 5. Valores numéricos y nivel de log
+@pytest.mark.parametrize("name", ["NOTION_WORKERS", "NOTION_RATE_LIMIT", "HEARTBEAT_INTERVAL"])
+def test_unparseable_number_is_config_error(env, name):
+    env.setenv(name, "abc")
+    with pytest.raises(ConfigError, match=name):
+        Config.from_env()
+
+@pytest.mark.parametrize("name", [
+    "IO_THREADS", "NOTION_WORKERS", "NOTION_MAX_CONCURRENCY", "NOTION_RATE_LIMIT", "HEARTBEAT_INTERVAL",
+])
+def test_zero_is_rejected(env, name):
+    env.setenv(name, "0")
+    with pytest.raises(ConfigError, match=name):
+        Config.from_env()
+
+def test_legacy_notion_threads_fallback(env):
+    env.setenv("NOTION_THREADS", "3")
+    assert Config.from_env().io_threads == 3
+
+def test_unknown_log_level_rejected(env):
+    env.setenv("LOG_LEVEL", "verbose")
+    with pytest.raises(ConfigError, match="LOG_LEVEL"):
+        Config.from_env()